@@ -3,10 +3,15 @@ sys.path.append(os.path.join("objects"))
 import SudokuSquare
 from utils import *
 from GameResources import *
+from bitboard import History
 
 
 def play(values, result, history):
-    assignments = reconstruct(result, history)
+    if isinstance(history, History):
+        # assignments are popped from the end, so reverse the recorded trace
+        assignments = history.assignments()[::-1]
+    else:
+        assignments = reconstruct(result, history)
     pygame.init()
 
     size = width, height = 700, 700
@@ -0,0 +1,59 @@
+"""Solve a file of Sudoku puzzles (one 81-character grid per line) using every
+core on the machine, writing one solution per line in input order.
+
+    $ python batch.py puzzles.txt -o solutions.txt --workers 8
+
+Unsolvable puzzles produce an empty line so the output stays aligned with the
+input.  The throughput is reported on stderr when the run completes.
+"""
+import argparse
+import sys
+import timeit
+
+from solution import solve_many
+
+
+def read_grids(lines):
+    """Yield the non-blank lines of a puzzle file with whitespace stripped """
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('puzzles', help="file with one puzzle per line ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="file to write the solutions to ('-' for stdout)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="number of worker processes (default: all CPUs)")
+    parser.add_argument('--chunksize', type=int, default=64,
+                        help="number of puzzles sent to a worker at a time")
+    parser.add_argument('--trail', action='store_true',
+                        help="use trail-based backtracking instead of board copies")
+    args = parser.parse_args(argv)
+
+    infile = sys.stdin if args.puzzles == '-' else open(args.puzzles)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+
+    count = 0
+    start = timeit.default_timer()
+    try:
+        for result in solve_many(read_grids(infile), workers=args.workers,
+                                 trail=args.trail, chunksize=args.chunksize):
+            outfile.write((result or '') + '\n')
+            count += 1
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    elapsed = timeit.default_timer() - start
+
+    print("Solved {} puzzles in {:.2f}s ({:.1f} puzzles/sec)".format(
+        count, elapsed, count / elapsed if elapsed else float('inf')), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
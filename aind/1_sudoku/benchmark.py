@@ -0,0 +1,240 @@
+"""Benchmark the Sudoku solver on puzzle corpora (one grid per line): time
+`solve` with each backend, `reduce_puzzle` and every strategy on its own,
+count search nodes and propagation steps, and emit the results as JSON so
+regressions and speedups can be compared between runs.
+
+    $ python benchmark.py                          # all corpora in puzzles/
+    $ python benchmark.py hard diagonal --json results.json
+    $ python benchmark.py my_puzzles.txt --no-diagonal --backends search dlx
+
+The corpora shipped in `puzzles/` are:
+
+    easy      puzzles solved by constraint propagation alone
+    hard      well-known hard puzzles that need search
+    17clue    puzzles with the minimum of 17 givens
+    diagonal  the hardest (by search nodes) of a batch of randomly generated
+              diagonal Sudoku puzzles with a unique solution
+
+Only the diagonal corpus is solved with the diagonal units; the dictionary
+solver in `solution.py` always uses them, so it is only timed on that one.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from collections import OrderedDict
+
+import bitboard
+import dlx
+import solution
+import strategies
+from bitboard import History, SearchStats
+
+
+PUZZLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles')
+
+# corpus name -> (file in PUZZLE_DIR, whether the diagonal units apply)
+CORPORA = OrderedDict([
+    ('easy', ('easy.txt', False)),
+    ('hard', ('hard.txt', False)),
+    ('17clue', ('17clue.txt', False)),
+    ('diagonal', ('diagonal.txt', True)),
+])
+
+
+def load_corpus(path):
+    """Return the grids of a puzzle file, skipping blank lines """
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _dict_search(board, stats):
+    return solution.search(board.to_values())
+
+
+def _search(board, stats):
+    return bitboard.search(board.copy(), stats=stats)
+
+
+def _search_trail(board, stats):
+    return bitboard.search(board.copy(), trail=True, stats=stats)
+
+
+def _search_passes(board, stats):
+    return bitboard.search(board.copy(), stats=stats, passes=strategies.Pipeline())
+
+
+def _dlx(board, stats):
+    return dlx.solve(board, stats=stats)
+
+
+BACKENDS = OrderedDict([
+    ('dict', _dict_search),
+    ('search', _search),
+    ('search-trail', _search_trail),
+    ('search-passes', _search_passes),
+    ('dlx', _dlx),
+])
+
+
+# strategies timed on their own, each applied once to every reduced board
+STRATEGIES = OrderedDict([
+    ('eliminate', bitboard.eliminate),
+    ('only_choice', bitboard.only_choice),
+    ('naked_twins', bitboard.naked_twins),
+])
+
+
+def summarize(times):
+    """Return the total, mean and max (in milliseconds) of a list of timings """
+    return OrderedDict([
+        ('total_ms', 1000 * sum(times)),
+        ('mean_ms', 1000 * sum(times) / len(times) if times else 0.),
+        ('max_ms', 1000 * max(times) if times else 0.),
+    ])
+
+
+def run_backend(fn, boards):
+    """Solve every board with a backend
+
+    Returns
+    -------
+    (list, SearchStats)
+        the time (in seconds) taken by each board and the accumulated counters
+    """
+    stats = SearchStats()
+    timer = timeit.default_timer
+    times = []
+    for board in boards:
+        start = timer()
+        if not fn(board, stats):
+            raise RuntimeError("Backend failed to solve {}".format(board.to_grid()))
+        times.append(timer() - start)
+    return times, stats
+
+
+def time_each(fn, boards):
+    """Time `fn` on a copy of every board, returning the list of timings """
+    timer = timeit.default_timer
+    times = []
+    for board in boards:
+        board = board.copy()
+        start = timer()
+        fn(board)
+        times.append(timer() - start)
+    return times
+
+
+def propagation_steps(boards):
+    """Count the candidate changes made while solving each board
+
+    The boards are solved with a `History` observer in an untimed run, so
+    the counting does not slow down the timed runs.
+    """
+    steps = []
+    for board in boards:
+        history = History()
+        bitboard.search(board.observe(history), trail=True)
+        steps.append(len(history))
+    return steps
+
+
+def benchmark_corpus(grids, diagonal, backends):
+    """Run every measurement on one corpus and return the results as a dict """
+    boards = [solution.grid2board(grid, diagonal=diagonal) for grid in grids]
+    # build the exact cover matrix outside of the timings
+    dlx.sudoku_cover(boards[0].tables)
+    result = OrderedDict([('puzzles', len(boards)), ('diagonal', diagonal)])
+
+    result['solve'] = OrderedDict()
+    for name in backends:
+        if name == 'dict' and not diagonal:
+            continue
+        times, stats = run_backend(BACKENDS[name], boards)
+        result['solve'][name] = summarize(times)
+        if name != 'dict':
+            result['solve'][name]['nodes'] = stats.nodes
+
+    reduce_times = OrderedDict([('bitboard', time_each(bitboard.reduce_puzzle, boards))])
+    if diagonal:
+        reduce_times['dict'] = time_each(lambda b: solution.reduce_puzzle(b.to_values()), boards)
+    result['reduce_puzzle'] = OrderedDict((k, summarize(v)) for k, v in reduce_times.items())
+
+    reduced = [b for b in (bitboard.reduce_puzzle(b.copy()) for b in boards) if b]
+    result['strategies'] = OrderedDict()
+    for name, fn in STRATEGIES.items():
+        result['strategies'][name] = summarize(time_each(fn, reduced))
+    for name, fn in strategies.PASSES.items():
+        eliminations = []
+
+        def apply_pass(board):
+            remove = strategies.Remover(board)
+            try:
+                fn(board, remove)
+            except strategies.Contradiction:
+                pass
+            eliminations.append(remove.removed)
+        result['strategies'][name] = summarize(time_each(apply_pass, reduced))
+        result['strategies'][name]['eliminations'] = sum(eliminations)
+
+    steps = propagation_steps(boards)
+    result['propagation_steps'] = OrderedDict([('total', sum(steps)), ('max', max(steps))])
+    return result
+
+
+def print_report(name, result):
+    print("\n{} ({} puzzles{})".format(name, result['puzzles'],
+                                       ", diagonal" if result['diagonal'] else ""))
+    print("  {:<20}{:>12}{:>12}{:>12}{:>10}".format("solve", "Total (ms)", "Mean (ms)",
+                                                    "Max (ms)", "Nodes"))
+    for backend, r in result['solve'].items():
+        print("  {:<20}{:>12.2f}{:>12.3f}{:>12.3f}{:>10}".format(
+            backend, r['total_ms'], r['mean_ms'], r['max_ms'], r.get('nodes', '-')))
+    for section in ('reduce_puzzle', 'strategies'):
+        print("  {:<20}{:>12}{:>12}{:>12}".format(section, "Total (ms)", "Mean (ms)", "Max (ms)"))
+        for key, r in result[section].items():
+            print("  {:<20}{:>12.2f}{:>12.3f}{:>12.3f}".format(
+                key, r['total_ms'], r['mean_ms'], r['max_ms']))
+    print("  propagation steps: {total} total, {max} max".format(**result['propagation_steps']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('corpora', nargs='*', default=list(CORPORA),
+                        help="corpus names ({}) or puzzle files".format(', '.join(CORPORA)))
+    parser.add_argument('--no-diagonal', dest='diagonal', action='store_false',
+                        help="solve puzzle files as standard (non-diagonal) Sudoku")
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS),
+                        choices=list(BACKENDS), help="backends to time")
+    parser.add_argument('--json', metavar='PATH',
+                        help="write the results as JSON to PATH ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    results = OrderedDict([
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('corpora', OrderedDict()),
+    ])
+    for corpus in args.corpora:
+        if corpus in CORPORA:
+            filename, diagonal = CORPORA[corpus]
+            path = os.path.join(PUZZLE_DIR, filename)
+        else:
+            path, diagonal = corpus, args.diagonal
+        result = benchmark_corpus(load_corpus(path), diagonal, args.backends)
+        results['corpora'][corpus] = result
+        if args.json != '-':
+            print_report(corpus, result)
+
+    if args.json == '-':
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+"""Bitmask board representation for the Sudoku solver.
+
+The dictionary representation used in `solution.py` keeps the candidates for
+each box as a string (e.g., {'A1': '123456789', ...}), so every strategy pays
+for string building and searching.  This module stores the same information
+in a flat list with one integer per box, where bit k is set when the k-th
+digit is still a candidate for that box.  Units and peers are precomputed as
+tuples of list indices so the strategies never touch box names.
+"""
+
+# largest number of digits for which per-mask lookup lists are precomputed
+MAX_TABLE_DIGITS = 16
+
+
+class BoardTables(object):
+    """Precomputed index tables describing the geometry of a Sudoku board.
+
+    Parameters
+    ----------
+    boxes(list)
+        a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
+
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes
+
+    digits(string)
+        the symbols that may be placed in a box, in bit order
+    """
+    def __init__(self, boxes, unitlist, digits='123456789'):
+        self.boxes = tuple(boxes)
+        self.digits = digits
+        self.index = {box: i for i, box in enumerate(self.boxes)}
+        self.units = tuple(tuple(self.index[box] for box in unit) for unit in unitlist)
+
+        member_units = [[] for _ in self.boxes]
+        for u, unit in enumerate(self.units):
+            for i in unit:
+                member_units[i].append(u)
+        # unit indices (into self.units) that each box belongs to
+        self.box_units = tuple(tuple(m) for m in member_units)
+        self.peers = tuple(
+            tuple(sorted(set(p for u in member_units[i] for p in self.units[u]) - {i}))
+            for i in range(len(self.boxes)))
+
+        self.full = (1 << len(digits)) - 1
+        self.bit = {d: 1 << k for k, d in enumerate(digits)}
+        # tables indexed by candidate mask; lists are only affordable up to
+        # 16 digits, larger boards compute the entries on demand
+        count = lambda m: bin(m).count('1')
+        candidates = lambda m: ''.join(d for k, d in enumerate(digits) if m >> k & 1)
+        if len(digits) <= MAX_TABLE_DIGITS:
+            self.count = [count(m) for m in range(self.full + 1)]
+            self.candidates = [candidates(m) for m in range(self.full + 1)]
+        else:
+            self.count = _MaskTable(count)
+            self.candidates = _MaskTable(candidates)
+
+        # rows, columns and squares by kind, for strategies that intersect
+        # units (see `from_geometry`); empty when only a unitlist is known
+        self.rows = self.cols = self.squares = ()
+        self.row_of = self.col_of = self.square_of = ()
+        # (n, diagonal) of the geometry the tables were built from, which
+        # `utils.make_geometry` rebuilds them from (e.g. in another process);
+        # None when only a unitlist is known
+        self.key = None
+
+    @classmethod
+    def from_geometry(cls, geometry):
+        """Build the tables of a `utils.Geometry`, keeping the units by kind """
+        tables = cls(geometry.boxes, geometry.unitlist, geometry.digits)
+        index = tables.index
+        for name, of_name, unitlist in [('rows', 'row_of', geometry.row_units),
+                                        ('cols', 'col_of', geometry.column_units),
+                                        ('squares', 'square_of', geometry.square_units)]:
+            kind = tuple(tuple(index[box] for box in unit) for unit in unitlist)
+            # position (into the units of this kind) of the unit holding each box
+            of = [None] * len(tables.boxes)
+            for k, unit in enumerate(kind):
+                for i in unit:
+                    of[i] = k
+            setattr(tables, name, kind)
+            setattr(tables, of_name, tuple(of))
+        tables.key = (geometry.n, bool(geometry.diagonal_units))
+        return tables
+
+
+class _MaskTable(object):
+    """Stand-in for a lookup list that computes each entry when indexed """
+    __slots__ = ('fn',)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __getitem__(self, mask):
+        return self.fn(mask)
+
+
+class BitBoard(object):
+    """A Sudoku board storing the candidates of every box as a bitmask.
+
+    Parameters
+    ----------
+    tables(BoardTables)
+        the geometry of the board
+
+    cells(list)
+        one candidate mask per box, in the order of `tables.boxes`
+    """
+    __slots__ = ('tables', 'cells')
+
+    def __init__(self, tables, cells):
+        self.tables = tables
+        self.cells = cells
+
+    @classmethod
+    def from_grid(cls, grid, tables):
+        """Build a board from a string with one symbol (or '.') per box """
+        full, bit = tables.full, tables.bit
+        return cls(tables, [bit[ch] if ch in bit else full for ch in grid])
+
+    @classmethod
+    def from_values(cls, values, tables):
+        """Build a board from the dictionary representation """
+        bit = tables.bit
+        cells = []
+        for box in tables.boxes:
+            mask = 0
+            for d in values[box]:
+                mask |= bit[d]
+            cells.append(mask)
+        return cls(tables, cells)
+
+    def copy(self):
+        return BitBoard(self.tables, self.cells.copy())
+
+    def observe(self, history):
+        """Return a copy of the board that reports every change to `history`
+
+        The strategies write to `board.cells` directly; a recording board
+        swaps the plain list for an `ObservedCells` list, so boards that are
+        not observed run exactly the same code with no recording overhead.
+        """
+        history.start(self)
+        return BitBoard(self.tables, ObservedCells(self.cells, history))
+
+    def to_values(self):
+        """Convert the board to the dictionary representation """
+        candidates = self.tables.candidates
+        return {box: candidates[m] for box, m in zip(self.tables.boxes, self.cells)}
+
+    def to_grid(self):
+        """Convert the board to a string with '.' for unsolved boxes """
+        count, candidates = self.tables.count, self.tables.candidates
+        return ''.join(candidates[m] if count[m] == 1 else '.' for m in self.cells)
+
+    def is_solved(self):
+        count = self.tables.count
+        return all(count[m] == 1 for m in self.cells)
+
+
+class ObservedCells(list):
+    """A list of candidate masks that reports every assignment to a history """
+    __slots__ = ('history',)
+
+    def __init__(self, cells, history):
+        list.__init__(self, cells)
+        self.history = history
+
+    def __setitem__(self, i, mask):
+        list.__setitem__(self, i, mask)
+        self.history.deltas.append((i, mask))
+
+    def copy(self):
+        return ObservedCells(self, self.history)
+
+
+class History(object):
+    """Observer recording the trace of a solve as compact (box, mask) deltas
+
+    Pass a History to `solution.solve` to record every candidate change made
+    while solving, in order (including the changes undone when the search
+    backtracks), e.g. to replay them in the PySudoku visualizer.
+
+    Attributes
+    ----------
+    deltas(list)
+        the (box index, new candidate mask) of every change, in order
+    """
+    def __init__(self):
+        self.tables = None
+        self.deltas = []
+
+    def start(self, board):
+        self.tables = board.tables
+
+    def assignments(self):
+        """Return the trace as a list of (box name, candidates) pairs """
+        boxes, candidates = self.tables.boxes, self.tables.candidates
+        return [(boxes[i], candidates[m]) for i, m in self.deltas]
+
+    def __len__(self):
+        return len(self.deltas)
+
+
+def naked_twins(board):
+    """Eliminate values using the naked twins strategy (see `solution.naked_twins`)
+
+    All pairs of naked twins are collected from the input board before any
+    digit is removed, matching the convention of the dictionary version.
+    """
+    cells, count = board.cells, board.tables.count
+    eliminations = []
+    for unit in board.tables.units:
+        seen = set()
+        for i in unit:
+            m = cells[i]
+            if count[m] == 2:
+                if m in seen:
+                    eliminations.append((unit, m))
+                seen.add(m)
+    for unit, m in eliminations:
+        for i in unit:
+            if cells[i] != m and count[cells[i]] > 1:
+                cells[i] &= ~m
+    return board
+
+
+def eliminate(board):
+    """Remove the digit of every solved box from its peers
+
+    Rather than visiting the peers of each solved box, the solved digits of
+    every unit are collected once and masked out of the unsolved boxes.  Two
+    solved boxes sharing a digit in the same unit leave a box with no
+    candidates, just like the dictionary version does.
+    """
+    cells, tables = board.cells, board.tables
+    count = tables.count
+    solved = []
+    for unit in tables.units:
+        mask = 0
+        for i in unit:
+            m = cells[i]
+            if count[m] == 1:
+                if mask & m:
+                    cells[i] = 0
+                mask |= m
+        solved.append(mask)
+    for i, member in enumerate(tables.box_units):
+        m = cells[i]
+        if count[m] > 1:
+            for u in member:
+                m &= ~solved[u]
+            cells[i] = m
+    return board
+
+
+def only_choice(board):
+    """Assign every digit that fits in only one box of a unit to that box
+
+    A box that is the only choice for two different digits of the same unit
+    is left with no candidates, and so is the first box of a unit where some
+    digit has no place left, so both contradictions are caught by the caller.
+    """
+    cells, full = board.cells, board.tables.full
+    for unit in board.tables.units:
+        once = twice = 0
+        for i in unit:
+            m = cells[i]
+            twice |= once & m
+            once |= m
+        if once != full:
+            cells[unit[0]] = 0
+            return board
+        singles = once & ~twice
+        if singles:
+            for i in unit:
+                hit = cells[i] & singles
+                if hit:
+                    cells[i] = hit if not hit & (hit - 1) else 0
+    return board
+
+
+def propagate(board, pending, dirty, trail=None):
+    """Propagate eliminate and only_choice from a set of changed boxes
+
+    Only the peers of newly solved boxes and the member units of boxes that
+    lost candidates are revisited, so the work done scales with what changed
+    rather than with the size of the board.
+
+    Parameters
+    ----------
+    board(BitBoard)
+        the board to reduce in place
+
+    pending(list)
+        indices of solved boxes whose digit must be removed from their peers
+
+    dirty(set)
+        indices (into `board.tables.units`) of units to check for only choices
+
+    trail(list)
+        if given, the (index, mask) of every box is appended before it changes
+        so the caller can rewind the board with `undo`
+
+    Returns
+    -------
+    BitBoard or False
+        The reduced board, or False as soon as a contradiction is found
+    """
+    cells, tables = board.cells, board.tables
+    peers, box_units, units = tables.peers, tables.box_units, tables.units
+    count, full = tables.count, tables.full
+    while True:
+        while pending:
+            i = pending.pop()
+            m = cells[i]
+            keep = ~m
+            for p in peers[i]:
+                c = cells[p]
+                if c & m:
+                    if trail is not None:
+                        trail.append((p, c))
+                    c &= keep
+                    if not c:
+                        return False
+                    cells[p] = c
+                    if count[c] == 1:
+                        pending.append(p)
+                    dirty.update(box_units[p])
+        if not dirty:
+            return board
+        unit = units[dirty.pop()]
+        once = twice = 0
+        for i in unit:
+            m = cells[i]
+            twice |= once & m
+            once |= m
+        if once != full:
+            return False
+        singles = once & ~twice
+        if singles:
+            for i in unit:
+                m = cells[i]
+                hit = m & singles
+                if hit and hit != m:
+                    if hit & (hit - 1):
+                        return False
+                    if trail is not None:
+                        trail.append((i, m))
+                    cells[i] = hit
+                    pending.append(i)
+                    dirty.update(box_units[i])
+
+
+def assign(board, i, bit, trail=None):
+    """Assign a digit to a box and propagate the consequences
+
+    Returns
+    -------
+    BitBoard or False
+        The reduced board, or False if the assignment leads to a contradiction
+    """
+    if trail is not None:
+        trail.append((i, board.cells[i]))
+    board.cells[i] = bit
+    return propagate(board, [i], set(board.tables.box_units[i]), trail)
+
+
+def undo(board, trail, mark):
+    """Rewind the board to the state it had when the trail had `mark` entries """
+    cells = board.cells
+    while len(trail) > mark:
+        i, m = trail.pop()
+        cells[i] = m
+
+
+def reduce_puzzle(board):
+    """Reduce the board with eliminate and only_choice until nothing changes
+
+    Returns
+    -------
+    BitBoard or False
+        The reduced board, or False if the puzzle is unsolvable
+    """
+    cells, count = board.cells, board.tables.count
+    if 0 in cells:
+        return False
+    solved = [i for i, m in enumerate(cells) if count[m] == 1]
+    return propagate(board, solved, set(range(len(board.tables.units))))
+
+
+class SearchStats(object):
+    """Counters filled in by `search` to compare the backtracking modes.
+
+    Attributes
+    ----------
+    nodes(int)
+        the number of search nodes (boxes branched on) visited
+
+    backtracks(int)
+        the number of assignments that led to a contradiction or dead end
+
+    copies(int)
+        the number of boards allocated while branching (zero for the trail)
+
+    max_trail(int)
+        the largest number of undo records held on the trail at once
+    """
+    __slots__ = ('nodes', 'backtracks', 'copies', 'max_trail')
+
+    def __init__(self):
+        self.nodes = self.backtracks = self.copies = self.max_trail = 0
+
+    def __repr__(self):
+        return 'SearchStats(nodes={}, backtracks={}, copies={}, max_trail={})'.format(
+            self.nodes, self.backtracks, self.copies, self.max_trail)
+
+
+def search(board, trail=False, stats=None, passes=None):
+    """Solve the board with depth first search and constraint propagation
+
+    The board is reduced in place, and with `trail` it is also searched in
+    place; pass `board.copy()` to keep the caller's board unchanged.
+
+    Parameters
+    ----------
+    board(BitBoard)
+        the board to solve
+
+    trail(bool)
+        if True, mutate a single board and rewind it from an undo trail on
+        failure instead of copying the board for every branch
+
+    stats(SearchStats)
+        optional counters updated during the search
+
+    passes(callable)
+        optional extra inference run after every propagation, called as
+        `passes(board, trail)` and returning the board or False (see
+        `strategies.Pipeline`)
+
+    Returns
+    -------
+    BitBoard or False
+        The solved board, or False if no solution exists
+    """
+    board = reduce_puzzle(board)
+    if board and passes is not None:
+        board = passes(board)
+    if board is False:
+        return False
+    if stats is None:
+        stats = SearchStats()
+    if trail:
+        return board if _search_trail(board, [], stats, passes) else False
+    return _search_copy(board, stats, passes)
+
+
+def branch_box(board):
+    """Return the index of an unsolved box with the fewest candidates, or None """
+    count = board.tables.count
+    unsolved = [(count[m], i) for i, m in enumerate(board.cells) if count[m] > 1]
+    return min(unsolved)[1] if unsolved else None
+
+
+def _search_copy(board, stats, passes):
+    i = branch_box(board)
+    if i is None:
+        return board
+    stats.nodes += 1
+    mask = board.cells[i]
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        stats.copies += 1
+        child = assign(board.copy(), i, bit)
+        if child and passes is not None:
+            child = passes(child)
+        if child:
+            attempt = _search_copy(child, stats, passes)
+            if attempt:
+                return attempt
+        stats.backtracks += 1
+    return False
+
+
+def _search_trail(board, trail, stats, passes):
+    i = branch_box(board)
+    if i is None:
+        return True
+    stats.nodes += 1
+    mask = board.cells[i]
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        mark = len(trail)
+        if (assign(board, i, bit, trail) and (passes is None or passes(board, trail))
+                and _search_trail(board, trail, stats, passes)):
+            return True
+        if len(trail) > stats.max_trail:
+            stats.max_trail = len(trail)
+        undo(board, trail, mark)
+        stats.backtracks += 1
+    return False
+
+
+def count_solutions(board, limit=2, stats=None, passes=None):
+    """Count the solutions of a board, stopping once `limit` have been found
+
+    The search shares the propagation of `search` and rewinds a single copy
+    of the board from an undo trail, so the input board is left unchanged.
+
+    Returns
+    -------
+    int
+        The number of solutions, capped at `limit`
+    """
+    board = reduce_puzzle(board.copy())
+    if board and passes is not None:
+        board = passes(board)
+    if board is False:
+        return 0
+    if stats is None:
+        stats = SearchStats()
+    return _count_trail(board, [], limit, stats, passes)
+
+
+def _count_trail(board, trail, limit, stats, passes):
+    i = branch_box(board)
+    if i is None:
+        return 1
+    stats.nodes += 1
+    found = 0
+    mask = board.cells[i]
+    while mask and found < limit:
+        bit = mask & -mask
+        mask ^= bit
+        mark = len(trail)
+        if assign(board, i, bit, trail) and (passes is None or passes(board, trail)):
+            found += _count_trail(board, trail, limit - found, stats, passes)
+        if len(trail) > stats.max_trail:
+            stats.max_trail = len(trail)
+        undo(board, trail, mark)
+    return found
@@ -0,0 +1,270 @@
+"""Dancing links (Knuth's Algorithm X) exact-cover backend for the Sudoku solver.
+
+A Sudoku board is an exact cover problem: every row of the matrix places one
+digit in one box, and the columns require that each box holds exactly one
+digit and each unit (rows, columns, squares and, for diagonal Sudoku, the two
+diagonals) holds each digit exactly once.  The matrix is built once per
+`BoardTables` and the links are restored after every search, so solving a
+puzzle only covers the rows of its given boxes before searching.
+
+The links are stored in flat integer lists (left, right, up, down and the
+column of every node) rather than node objects, which keeps covering and
+uncovering cheap in Python.
+"""
+
+
+class ExactCover(object):
+    """A sparse 0/1 matrix stored as dancing links.
+
+    Parameters
+    ----------
+    ncols(int)
+        the number of (primary) columns that must each be covered exactly once
+
+    rows(list)
+        for every row of the matrix, the list of the columns it covers
+    """
+    def __init__(self, ncols, rows):
+        # node 0 is the root, nodes 1..ncols are the column headers
+        size = ncols + 1 + sum(len(r) for r in rows)
+        self.L = L = [0] * size
+        self.R = R = [0] * size
+        self.U = U = list(range(size))
+        self.D = D = list(range(size))
+        self.C = C = list(range(size))
+        self.row_of = row_of = [-1] * size
+        self.S = S = [0] * (ncols + 1)
+        for c in range(ncols + 1):
+            L[c] = c - 1 if c else ncols
+            R[c] = c + 1 if c < ncols else 0
+
+        # first node of every row, used to select or remove whole rows
+        self.row_start = []
+        node = ncols + 1
+        for r, columns in enumerate(rows):
+            first = node
+            for k, c in enumerate(columns):
+                c += 1
+                C[node] = c
+                row_of[node] = r
+                U[node] = U[c]
+                D[node] = c
+                D[U[c]] = node
+                U[c] = node
+                S[c] += 1
+                L[node] = node - 1 if k else first + len(columns) - 1
+                R[node] = node + 1 if k < len(columns) - 1 else first
+                node += 1
+            self.row_start.append(first)
+        self.nodes = 0
+
+    def cover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def _unlink_row(self, r):
+        U, D, C, S, R = self.U, self.D, self.C, self.S, self.R
+        first = j = self.row_start[r]
+        while True:
+            D[U[j]] = D[j]
+            U[D[j]] = U[j]
+            S[C[j]] -= 1
+            j = R[j]
+            if j == first:
+                break
+
+    def _relink_row(self, r):
+        U, D, C, S, L = self.U, self.D, self.C, self.S, self.L
+        first = self.row_start[r]
+        j = L[first]
+        while True:
+            S[C[j]] += 1
+            D[U[j]] = j
+            U[D[j]] = j
+            if j == first:
+                break
+            j = L[j]
+
+    def solve(self, selected=(), removed=(), limit=1):
+        """Find up to `limit` exact covers
+
+        Parameters
+        ----------
+        selected(iterable)
+            rows that must be part of every solution (e.g., the given boxes)
+
+        removed(iterable)
+            rows that must not be used (e.g., candidates already eliminated)
+
+        limit(int)
+            the number of solutions after which the search stops
+
+        Returns
+        -------
+        list
+            the solutions found, each a list of row indices
+        """
+        removed = list(removed)
+        for r in removed:
+            self._unlink_row(r)
+        covered = []
+        solutions = []
+        try:
+            for r in selected:
+                first = j = self.row_start[r]
+                # a selected row whose columns are already covered conflicts
+                # with an earlier selection
+                while True:
+                    if self.L[self.R[self.C[j]]] != self.C[j]:
+                        return solutions
+                    j = self.R[j]
+                    if j == first:
+                        break
+                while True:
+                    self.cover(self.C[j])
+                    covered.append(self.C[j])
+                    j = self.R[j]
+                    if j == first:
+                        break
+            self._search(list(selected), solutions, limit)
+            return solutions
+        finally:
+            for c in reversed(covered):
+                self.uncover(c)
+            for r in reversed(removed):
+                self._relink_row(r)
+
+    def _search(self, partial, solutions, limit):
+        R, D, S, C = self.R, self.D, self.S, self.C
+        self.nodes += 1
+        c = R[0]
+        if c == 0:
+            solutions.append(list(partial))
+            return len(solutions) >= limit
+        # branch on the column with the fewest rows left
+        best, size = c, S[c]
+        while c != 0 and size > 1:
+            if S[c] < size:
+                best, size = c, S[c]
+            c = R[c]
+        if size == 0:
+            return False
+        self.cover(best)
+        done = False
+        r = D[best]
+        while r != best:
+            partial.append(self.row_of[r])
+            j = R[r]
+            while j != r:
+                self.cover(C[j])
+                j = R[j]
+            done = self._search(partial, solutions, limit)
+            j = self.L[r]
+            while j != r:
+                self.uncover(C[j])
+                j = self.L[j]
+            partial.pop()
+            if done:
+                break
+            r = D[r]
+        self.uncover(best)
+        return done
+
+
+_matrices = {}
+
+
+def sudoku_cover(tables):
+    """Return the (cached) `ExactCover` matrix for a board geometry
+
+    Row `i * ndigits + k` places the k-th digit in box i, and covers the
+    column of box i plus one column per (unit, digit) for the units of box i.
+    """
+    key = id(tables)
+    if key not in _matrices:
+        nboxes, ndigits = len(tables.boxes), len(tables.digits)
+        rows = []
+        for i in range(nboxes):
+            for k in range(ndigits):
+                rows.append([i] + [nboxes + u * ndigits + k for u in tables.box_units[i]])
+        _matrices[key] = (tables, ExactCover(nboxes + len(tables.units) * ndigits, rows))
+    return _matrices[key][1]
+
+
+def solve(board, limit=1, stats=None):
+    """Solve a `BitBoard` as an exact cover problem
+
+    Boxes with a single candidate are given; boxes whose candidates were
+    already narrowed down only keep the rows of their remaining candidates.
+
+    Parameters
+    ----------
+    board(BitBoard)
+        the board to solve (it is not modified)
+
+    limit(int)
+        the number of solutions to look for
+
+    stats(SearchStats)
+        optional counters; `nodes` is increased by the number of search nodes
+
+    Returns
+    -------
+    list
+        up to `limit` solved boards
+    """
+    tables = board.tables
+    ndigits, count, full = len(tables.digits), tables.count, tables.full
+    matrix = sudoku_cover(tables)
+    selected, removed = [], []
+    for i, m in enumerate(board.cells):
+        if m == full:
+            continue
+        if not m:
+            return []
+        for k in range(ndigits):
+            if not m >> k & 1:
+                removed.append(i * ndigits + k)
+            elif count[m] == 1:
+                selected.append(i * ndigits + k)
+    # rows of given boxes are selected; the other rows of those boxes are
+    # covered by the selection, so they don't need to be removed
+    given = set(r // ndigits for r in selected)
+    removed = [r for r in removed if r // ndigits not in given]
+
+    nodes = matrix.nodes
+    solutions = matrix.solve(selected, removed, limit)
+    if stats is not None:
+        stats.nodes += matrix.nodes - nodes
+
+    results = []
+    for rows in solutions:
+        cells = [0] * len(tables.boxes)
+        for r in rows:
+            cells[r // ndigits] = 1 << (r % ndigits)
+        results.append(type(board)(tables, cells))
+    return results
@@ -1,22 +1,69 @@
 
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+
 from utils import *
+from bitboard import BoardTables, BitBoard, History, SearchStats
+import bitboard
+import dlx
 
 
-row_units = [cross(r, cols) for r in rows]
-column_units = [cross(rows, c) for c in cols]
-square_units = [cross(rs, cs) for rs in ('ABC','DEF','GHI') for cs in ('123','456','789')]
-unitlist = row_units + column_units + square_units
+# The units and peers are generated for the standard 9x9 board (3x3 squares)
+# with the two diagonal units added to the unitlist
+geometry = make_geometry(3, diagonal=True)
+digits = geometry.digits
 
-diagonal1 = [r+c for r, c in zip(rows, cols)]
-diagonal2 = [r+c for r, c in zip(rows, cols[::-1])]
+row_units = geometry.row_units
+column_units = geometry.column_units
+square_units = geometry.square_units
+diagonal_units = geometry.diagonal_units
 # unitlist is a list of lists
-diagonal_units = [diagonal1, diagonal2]
-unitlist = unitlist + diagonal_units
+unitlist = geometry.unitlist
+
+units = geometry.units
+peers = geometry.peers
+# indices (into unitlist) of the member units of each box, for reduce_puzzle
+unit_ids = {box: [i for i, unit in enumerate(unitlist) if box in unit] for box in boxes}
+
+# Index tables for the bitmask representation, built from the same unitlist
+board_tables = BoardTables.from_geometry(geometry)
+_tables_cache = {(3, True): board_tables}
+
+
+def get_tables(n=3, diagonal=True):
+    """Return the (cached) `BoardTables` for a board with n x n squares
+
+    The bitmask strategies only rely on these tables, so they solve 16x16
+    (n=4) and 25x25 (n=5) boards unchanged. See `utils.make_geometry`.
+    """
+    key = (n, diagonal)
+    if key not in _tables_cache:
+        _tables_cache[key] = BoardTables.from_geometry(make_geometry(n, diagonal))
+    return _tables_cache[key]
+
+
+def grid2board(grid, n=3, diagonal=True):
+    """Convert grid into a `BitBoard` for a board with n x n squares
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid, with one symbol (or '.') per box.
+        Boards larger than 9x9 use the digits '123456789ABCDEFGHIJKLMNOP'.
 
+    n(int)
+        the size of a square (3 for the standard 9x9 board)
 
-# Must be called after all units (including diagonals) are added to the unitlist
-units = extract_units(unitlist, boxes)
-peers = extract_peers(units, boxes)
+    diagonal(bool)
+        whether the two main diagonals are units of the board
+
+    Returns
+    -------
+    BitBoard
+        The bitmask representation of the grid, which `solve` also accepts
+    """
+    return BitBoard.from_grid(grid, get_tables(n, diagonal))
 
 
 def naked_twins(values):
@@ -113,7 +160,7 @@ def only_choice(values):
     You should be able to complete this function by copying your code from the classroom
     """
     for u in unitlist:
-        for digit in '123456789':
+        for digit in digits:
             dbox = [box for box in u if digit in values[box]]
             if len(dbox) == 1:
                 values[dbox[0]] = digit
@@ -123,6 +170,11 @@ def only_choice(values):
 def reduce_puzzle(values):
     """Reduce a Sudoku puzzle by repeatedly applying all constraint strategies
 
+    The strategies are driven by a worklist: solved boxes are queued so their
+    digit is eliminated from their peers only once, and a unit is re-checked
+    for only choices only when one of its boxes lost a candidate. The sanity
+    check happens as soon as a box runs out of candidates.
+
     Parameters
     ----------
     values(dict)
@@ -134,22 +186,36 @@ def reduce_puzzle(values):
         The values dictionary after continued application of the constraint strategies
         no longer produces any changes, or False if the puzzle is unsolvable 
     """
-    stalled = False
-    while not stalled:
-        # Check how many boxes have a determined value
-        solved_values_before = len([box for box in values.keys() if len(values[box]) == 1])
-        # Your code here: Use the Eliminate Strategy
-        values = eliminate(values)
-        # Your code here: Use the Only Choice Strategy
-        values = only_choice(values)
-        # Check how many boxes have a determined value, to compare
-        solved_values_after = len([box for box in values.keys() if len(values[box]) == 1])
-        # If no new values were added, stop the loop.
-        stalled = solved_values_before == solved_values_after
-        # Sanity check, return False if there is a box with zero available values:
-        if len([box for box in values.keys() if len(values[box]) == 0]):
-            return False
-    return values
+    if any(len(values[box]) == 0 for box in boxes):
+        return False
+    pending = [box for box in boxes if len(values[box]) == 1]
+    dirty = set(range(len(unitlist)))
+    while True:
+        # Eliminate the digit of each newly solved box from its peers
+        while pending:
+            box = pending.pop()
+            digit = values[box]
+            for peer in peers[box]:
+                if digit in values[peer]:
+                    remaining = values[peer].replace(digit, '')
+                    if not remaining:
+                        return False
+                    values[peer] = remaining
+                    if len(remaining) == 1:
+                        pending.append(peer)
+                    dirty.update(unit_ids[peer])
+        if not dirty:
+            return values
+        # Look for only choices in a unit where some box lost a candidate
+        unit = unitlist[dirty.pop()]
+        for digit in digits:
+            dbox = [box for box in unit if digit in values[box]]
+            if not dbox:
+                return False
+            if len(dbox) == 1 and values[dbox[0]] != digit:
+                values[dbox[0]] = digit
+                pending.append(dbox[0])
+                dirty.update(unit_ids[dbox[0]])
 
 
 def search(values):
@@ -188,35 +254,199 @@ def search(values):
             return attemp
 
 
-def solve(grid):
+def solve(grid, trail=False, stats=None, passes=None, backend='search', history=None):
     """Find the solution to a Sudoku puzzle using search and constraint propagation
 
     Parameters
     ----------
-    grid(string)
+    grid(string or BitBoard)
         a string representing a sudoku grid.
         
         Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
 
+        A `BitBoard` (see `grid2board`) is solved with the bitmask strategies
+        in `bitboard.py`, which are much faster on large batches of puzzles.
+        The board itself is left unchanged by every backend.
+
+    trail(bool)
+        if True, solve with the bitmask strategies on a single board that is
+        rewound from an undo trail instead of copied for every branch
+
+    stats(SearchStats)
+        optional counters (nodes, backtracks, copies) filled in by the bitmask search
+
+    passes(strategies.Pipeline)
+        optional inference passes (naked/hidden subsets, pointing pairs, ...)
+        run by the bitmask search after every propagation
+
+    backend(string)
+        'search' for constraint propagation and depth first search, or 'dlx'
+        to solve the board as an exact cover problem with dancing links
+
+    history(History)
+        optional observer recording every candidate change as a (box, mask)
+        delta for visualization; the trail search is used so the recorded
+        trace stays consistent when the search backtracks
+
     Returns
     -------
     dict or False
         The dictionary representation of the final sudoku grid or False if no solution exists.
     """
+    if backend == 'dlx':
+        board = grid if isinstance(grid, BitBoard) else grid2board(grid)
+        solutions = dlx.solve(board, stats=stats)
+        return solutions[0].to_values() if solutions else False
+    if backend != 'search':
+        raise ValueError("Unknown backend: {}".format(backend))
+    if isinstance(grid, BitBoard):
+        # the bitmask search reduces and searches its board in place
+        grid = grid.copy()
+    if history is not None:
+        board = grid if isinstance(grid, BitBoard) else grid2board(grid)
+        grid, trail = board.observe(history), True
+    if trail or stats is not None or passes is not None or isinstance(grid, BitBoard):
+        board = grid if isinstance(grid, BitBoard) else grid2board(grid)
+        board = bitboard.search(board, trail=trail, stats=stats, passes=passes)
+        return board.to_values() if board else False
     values = grid2values(grid)
     values = search(values)
     return values
 
 
+def _solve_grid(grid, trail=False):
+    """Solve one grid with the bitmask strategies, for use in worker processes.
+
+    Returns the solution as an 81-character string, or None if the grid has
+    no solution.
+    """
+    board = bitboard.search(grid2board(grid), trail=trail)
+    return board.to_grid() if board else None
+
+
+def solve_many(grids, workers=None, trail=False, chunksize=64):
+    """Solve a stream of Sudoku puzzles, fanning the work out to a process pool
+
+    Parameters
+    ----------
+    grids(iterable)
+        strings representing sudoku grids, consumed lazily so the input can be
+        larger than memory
+
+    workers(int)
+        the number of worker processes; defaults to the number of CPUs, and
+        1 solves the puzzles in the calling process
+
+    trail(bool)
+        use the trail-based backtracking search (see `solve`)
+
+    chunksize(int)
+        the number of puzzles sent to a worker at a time
+
+    Yields
+    ------
+    string or None
+        The solution of each grid as an 81-character string (or None if the
+        grid is unsolvable), in the same order as the input
+    """
+    solver = partial(_solve_grid, trail=trail)
+    if workers == 1:
+        for grid in grids:
+            yield solver(grid)
+        return
+
+    workers = workers or cpu_count()
+    # feed the pool one block at a time so only a bounded number of puzzles
+    # is held in memory, whatever the size of the input
+    block_size = workers * chunksize * 4
+    grids = iter(grids)
+    with Pool(workers) as pool:
+        while True:
+            block = list(islice(grids, block_size))
+            if not block:
+                break
+            for result in pool.imap(solver, block, chunksize):
+                yield result
+
+
+def _count_branch(cells, key, limit):
+    """Count the solutions below one first-level branch, in a worker process """
+    return bitboard.count_solutions(BitBoard(get_tables(*key), cells), limit)
+
+
+def count_solutions(grid, limit=2, workers=1, n=3, diagonal=True):
+    """Count the solutions of a Sudoku puzzle, stopping once `limit` are found
+
+    With the default limit this tells unsolvable (0), unique (1) and
+    ambiguous (2) puzzles apart, which is what validating a puzzle bank
+    needs, without exploring the whole search tree.
+
+    Parameters
+    ----------
+    grid(string or BitBoard)
+        a string representing a sudoku grid, or a board from `grid2board`
+
+    limit(int)
+        the number of solutions after which counting stops
+
+    workers(int)
+        if more than 1, the branches of the first box the search branches on
+        are counted in parallel by a pool of that many processes
+
+    n(int), diagonal(bool)
+        the geometry of a string grid (see `grid2board`)
+
+    Returns
+    -------
+    int
+        The number of solutions, capped at `limit`
+    """
+    if isinstance(grid, BitBoard):
+        board = grid
+    else:
+        board = grid2board(grid, n, diagonal)
+    if workers == 1:
+        return bitboard.count_solutions(board, limit)
+    key = board.tables.key
+    if key is None:
+        raise ValueError("Parallel counting needs a board whose tables were built from a "
+                         "geometry, e.g. with `grid2board`")
+
+    board = bitboard.reduce_puzzle(board.copy())
+    if board is False:
+        return 0
+    i = bitboard.branch_box(board)
+    if i is None:
+        return 1
+    branches = []
+    mask = board.cells[i]
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        child = bitboard.assign(board.copy(), i, bit)
+        if child:
+            branches.append(child.cells)
+
+    found = 0
+    with Pool(min(workers, len(branches) or 1)) as pool:
+        # leaving the block terminates the branches still being counted
+        for count in pool.imap_unordered(partial(_count_branch, key=key, limit=limit), branches):
+            found += count
+            if found >= limit:
+                break
+    return min(found, limit)
+
+
 if __name__ == "__main__":
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     display(grid2values(diag_sudoku_grid))
-    result = solve(diag_sudoku_grid)
+    trace = History()
+    result = solve(diag_sudoku_grid, history=trace)
     display(result)
 
     try:
         import PySudoku
-        PySudoku.play(grid2values(diag_sudoku_grid), result, history)
+        PySudoku.play(grid2values(diag_sudoku_grid), result, trace)
 
     except SystemExit:
         pass
@@ -0,0 +1,296 @@
+"""Inference passes for the bitmask Sudoku solver.
+
+`bitboard.propagate` only applies the eliminate and only choice strategies,
+so hard puzzles fall through to search.  The passes in this module make
+stronger deductions (naked and hidden subsets, pointing pairs, box-line
+reduction and X-wing) and are registered by name in `PASSES`.  A `Pipeline`
+runs a configurable list of passes to a fixed point and counts, for each
+pass, how often it was called, how often it made progress and how long it
+took, so the passes that pay for their cost can be told from those that
+don't:
+
+    pipeline = Pipeline(['naked_pairs', 'pointing_pairs'])
+    solution.solve(grid, passes=pipeline)
+    print(pipeline.stats['pointing_pairs'].hits)
+
+Passes need the rows, columns and squares of the board, which are known to
+tables built with `BoardTables.from_geometry`.
+"""
+import timeit
+from collections import OrderedDict
+from functools import partial
+from itertools import combinations
+
+from bitboard import propagate
+
+
+class Contradiction(Exception):
+    """Raised by a pass when the board it is working on has no solution. """
+    pass
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+class Remover(object):
+    """Remove candidates from the boxes of a board on behalf of the passes.
+
+    Every removal is recorded on the trail (if any) and the changed boxes and
+    units are queued so `propagate` can follow up on them.
+    """
+    __slots__ = ('board', 'trail', 'pending', 'dirty', 'removed')
+
+    def __init__(self, board, trail=None):
+        self.board = board
+        self.trail = trail
+        self.pending = []
+        self.dirty = set()
+        self.removed = 0
+
+    def __call__(self, i, mask):
+        cells = self.board.cells
+        m = cells[i]
+        if not m & mask:
+            return
+        if self.trail is not None:
+            self.trail.append((i, m))
+        m &= ~mask
+        if not m:
+            raise Contradiction()
+        cells[i] = m
+        self.removed += 1
+        tables = self.board.tables
+        if tables.count[m] == 1:
+            self.pending.append(i)
+        self.dirty.update(tables.box_units[i])
+
+
+def naked_subsets(board, remove, size):
+    """Remove the digits of any `size` boxes of a unit whose candidates are
+    limited to `size` digits from the other boxes of the unit.
+    """
+    cells, count = board.cells, board.tables.count
+    for unit in board.tables.units:
+        group = [i for i in unit if 1 < count[cells[i]] <= size]
+        if len(group) < size:
+            continue
+        for subset in combinations(group, size):
+            mask = 0
+            for i in subset:
+                mask |= cells[i]
+            if count[mask] < size:
+                raise Contradiction()
+            if count[mask] == size:
+                for i in unit:
+                    if i not in subset:
+                        remove(i, mask)
+
+
+def hidden_subsets(board, remove, size):
+    """Restrict any `size` boxes of a unit that hold the only places left for
+    `size` digits to those digits.
+    """
+    cells, tables = board.cells, board.tables
+    ndigits = len(tables.digits)
+    for unit in tables.units:
+        # places[bit] is a mask of the positions in the unit allowing the digit
+        places = {}
+        for k in range(ndigits):
+            bit = 1 << k
+            where = 0
+            for slot, i in enumerate(unit):
+                if cells[i] & bit:
+                    where |= 1 << slot
+            if 1 < popcount(where) <= size:
+                places[bit] = where
+        if len(places) < size:
+            continue
+        for subset in combinations(places, size):
+            where = 0
+            for bit in subset:
+                where |= places[bit]
+            if popcount(where) == size:
+                keep = sum(subset)
+                for slot, i in enumerate(unit):
+                    if where >> slot & 1:
+                        remove(i, ~keep & tables.full)
+
+
+def _confined(groups):
+    """Return the digits present in exactly one of the candidate masks """
+    once = twice = 0
+    for m in groups:
+        twice |= once & m
+        once |= m
+    return once & ~twice
+
+
+def _intersect(board, remove, outer, inner, inner_of):
+    """For every `outer` unit, find digits confined to the boxes it shares
+    with a single `inner` unit and remove them from the rest of that unit.
+    """
+    cells = board.cells
+    for unit in outer:
+        groups = OrderedDict()
+        for i in unit:
+            k = inner_of[i]
+            groups[k] = groups.get(k, 0) | cells[i]
+        confined = _confined(groups.values())
+        if not confined:
+            continue
+        for k, m in groups.items():
+            digits = m & confined
+            if digits:
+                for i in inner[k]:
+                    if i not in unit:
+                        remove(i, digits)
+
+
+def pointing_pairs(board, remove):
+    """A digit confined to one row (or column) within a square cannot be
+    placed elsewhere in that row (or column).
+    """
+    tables = board.tables
+    _intersect(board, remove, tables.squares, tables.rows, tables.row_of)
+    _intersect(board, remove, tables.squares, tables.cols, tables.col_of)
+
+
+def box_line_reduction(board, remove):
+    """A digit confined to one square within a row (or column) cannot be
+    placed elsewhere in that square.
+    """
+    tables = board.tables
+    _intersect(board, remove, tables.rows, tables.squares, tables.square_of)
+    _intersect(board, remove, tables.cols, tables.squares, tables.square_of)
+
+
+def _x_wing(board, remove, lines, crossing, crossing_of):
+    cells = board.cells
+    for k in range(len(board.tables.digits)):
+        bit = 1 << k
+        seen = {}
+        for line in lines:
+            where = 0
+            for i in line:
+                if cells[i] & bit:
+                    where |= 1 << crossing_of[i]
+            if popcount(where) != 2:
+                continue
+            if where in seen:
+                wing = set(seen[where]) | set(line)
+                for c in range(len(crossing)):
+                    if where >> c & 1:
+                        for i in crossing[c]:
+                            if i not in wing:
+                                remove(i, bit)
+            else:
+                seen[where] = line
+
+
+def x_wing(board, remove):
+    """A digit that fits in exactly the same two columns of two rows (or the
+    same two rows of two columns) cannot be placed elsewhere in those columns
+    (or rows).
+    """
+    tables = board.tables
+    _x_wing(board, remove, tables.rows, tables.cols, tables.col_of)
+    _x_wing(board, remove, tables.cols, tables.rows, tables.row_of)
+
+
+# The registry of passes, in the order a default Pipeline runs them
+PASSES = OrderedDict([
+    ('naked_pairs', partial(naked_subsets, size=2)),
+    ('hidden_pairs', partial(hidden_subsets, size=2)),
+    ('pointing_pairs', pointing_pairs),
+    ('box_line_reduction', box_line_reduction),
+    ('naked_triples', partial(naked_subsets, size=3)),
+    ('hidden_triples', partial(hidden_subsets, size=3)),
+    ('x_wing', x_wing),
+])
+
+
+def register(name, fn):
+    """Add a pass to the registry; `fn(board, remove)` calls `remove(i, mask)`
+    for every candidate mask it can eliminate from box i.
+    """
+    PASSES[name] = fn
+
+
+class PassStats(object):
+    """Counters kept by a `Pipeline` for one pass.
+
+    Attributes
+    ----------
+    calls(int)
+        the number of times the pass was run
+
+    hits(int)
+        the number of runs that eliminated at least one candidate
+
+    eliminations(int)
+        the number of boxes that lost candidates because of the pass
+
+    time(float)
+        the time (in seconds) spent in the pass, including propagation
+    """
+    __slots__ = ('calls', 'hits', 'eliminations', 'time')
+
+    def __init__(self):
+        self.calls = self.hits = self.eliminations = 0
+        self.time = 0.
+
+    def __repr__(self):
+        return 'PassStats(calls={}, hits={}, eliminations={}, time={:.4f})'.format(
+            self.calls, self.hits, self.eliminations, self.time)
+
+
+class Pipeline(object):
+    """Run a list of registered passes, interleaved with propagation, until
+    none of them makes progress.
+
+    After any pass eliminates a candidate the consequences are propagated and
+    the pipeline restarts from its first pass, so list the cheap passes first.
+
+    Parameters
+    ----------
+    names(list)
+        the names of the passes to run (see `PASSES`), all of them by default
+    """
+    def __init__(self, names=None):
+        names = list(PASSES) if names is None else list(names)
+        self.passes = [(name, PASSES[name]) for name in names]
+        self.stats = OrderedDict((name, PassStats()) for name in names)
+
+    def __call__(self, board, trail=None):
+        """Apply the passes to a propagated board in place
+
+        Returns
+        -------
+        BitBoard or False
+            The reduced board, or False if a contradiction was found
+        """
+        remove = Remover(board, trail)
+        timer = timeit.default_timer
+        k = 0
+        while k < len(self.passes):
+            name, fn = self.passes[k]
+            stats = self.stats[name]
+            removed = remove.removed
+            start = timer()
+            try:
+                fn(board, remove)
+                consistent = propagate(board, remove.pending, remove.dirty, trail)
+            except Contradiction:
+                consistent = False
+            stats.calls += 1
+            stats.time += timer() - start
+            if remove.removed > removed:
+                stats.hits += 1
+                stats.eliminations += remove.removed - removed
+                k = 0
+            else:
+                k += 1
+            if not consistent:
+                return False
+        return board
@@ -3,8 +3,12 @@ tests does not guarantee that your solution is correct. The Project Asssistant t
 many additional test cases that you must also pass to complete the project. You should write your
 own additional test cases to cover any failed tests shown in the Project Assistant feedback.
 """
+import os
 import unittest
+
+import benchmark
 import solution
+import strategies
 
 
 class TestNakedTwins(unittest.TestCase):
@@ -99,5 +103,257 @@ class TestDiagonalSudoku(unittest.TestCase):
     def test_solve(self):
         self.assertEqual(solution.solve(self.diagonal_grid), self.solved_diag_sudoku)
 
+
+class TestReducePuzzle(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_matches_full_sweeps(self):
+        values = solution.grid2values(self.diagonal_grid)
+        stalled = dict(values)
+        while True:
+            before = dict(stalled)
+            stalled = solution.only_choice(solution.eliminate(stalled))
+            if stalled == before:
+                break
+        self.assertEqual(solution.reduce_puzzle(values), stalled)
+
+    def test_bitboard_matches_dict(self):
+        board = solution.bitboard.reduce_puzzle(solution.grid2board(self.diagonal_grid))
+        self.assertEqual(board.to_values(), solution.reduce_puzzle(solution.grid2values(self.diagonal_grid)))
+
+    def test_contradiction(self):
+        grid = '12' + '.' * 7 + '3' + '.' * 71
+        values = solution.grid2values(grid)
+        values['A3'] = '3'
+        self.assertFalse(solution.reduce_puzzle(values))
+        board = solution.grid2board(grid)
+        self.assertFalse(solution.bitboard.assign(board, 2, board.tables.bit['3']))
+
+
+class TestBitBoard(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_round_trip(self):
+        board = solution.grid2board(self.diagonal_grid)
+        self.assertEqual(board.to_grid(), self.diagonal_grid)
+        values = solution.grid2values(self.diagonal_grid)
+        self.assertEqual(solution.BitBoard.from_values(values, solution.board_tables).to_values(), values)
+
+    def test_naked_twins(self):
+        for before, after in [(TestNakedTwins.before_naked_twins_1, TestNakedTwins.possible_solutions_1),
+                              (TestNakedTwins.before_naked_twins_2, TestNakedTwins.possible_solutions_2)]:
+            board = solution.BitBoard.from_values(before, solution.board_tables)
+            self.assertIn(solution.bitboard.naked_twins(board).to_values(), after)
+
+    def test_solve(self):
+        board = solution.grid2board(self.diagonal_grid)
+        self.assertEqual(solution.solve(board), TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_unsolvable(self):
+        self.assertFalse(solution.solve(solution.grid2board('22' + '.' * 79)))
+
+    def test_trail_search(self):
+        copy_stats, trail_stats = solution.SearchStats(), solution.SearchStats()
+        self.assertEqual(solution.solve(self.diagonal_grid, stats=copy_stats),
+                         TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertEqual(solution.solve(self.diagonal_grid, trail=True, stats=trail_stats),
+                         TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertEqual(copy_stats.nodes, trail_stats.nodes)
+        self.assertEqual(trail_stats.copies, 0)
+
+    def test_undo(self):
+        board = solution.grid2board(self.diagonal_grid)
+        before = list(board.cells)
+        trail = []
+        solution.bitboard.assign(board, 1, board.tables.bit['6'], trail)
+        self.assertNotEqual(board.cells, before)
+        solution.bitboard.undo(board, trail, 0)
+        self.assertEqual(board.cells, before)
+        self.assertEqual(trail, [])
+
+    def test_solve_keeps_board(self):
+        board = solution.grid2board(self.diagonal_grid)
+        before = list(board.cells)
+        for kwargs in [{}, {'trail': True}, {'passes': strategies.Pipeline()},
+                       {'history': solution.History()}, {'backend': 'dlx'}]:
+            self.assertEqual(solution.solve(board, **kwargs), TestDiagonalSudoku.solved_diag_sudoku)
+            self.assertEqual(board.cells, before, kwargs)
+
+
+class TestDLX(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_solve(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, backend='dlx'),
+                         TestDiagonalSudoku.solved_diag_sudoku)
+        # the links are restored, so the matrix can be reused
+        self.assertEqual(solution.solve(self.diagonal_grid, backend='dlx'),
+                         TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_unsolvable(self):
+        self.assertFalse(solution.solve('22' + '.' * 79, backend='dlx'))
+
+    def test_reduced_board(self):
+        values = solution.reduce_puzzle(solution.grid2values(self.diagonal_grid))
+        board = solution.BitBoard.from_values(values, solution.board_tables)
+        self.assertEqual(solution.solve(board, backend='dlx'), TestDiagonalSudoku.solved_diag_sudoku)
+
+    def test_exact_cover(self):
+        # Knuth's example matrix, whose only exact cover is rows 0, 3 and 4
+        rows = [[2, 4, 5], [0, 3, 6], [1, 2, 5], [0, 3], [1, 6], [3, 4, 6]]
+        matrix = solution.dlx.ExactCover(7, rows)
+        self.assertEqual([sorted(s) for s in matrix.solve(limit=2)], [[0, 3, 4]])
+
+
+class TestCountSolutions(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_unique(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid), 1)
+
+    def test_limit(self):
+        self.assertEqual(solution.count_solutions('.' * 81, limit=3), 3)
+
+    def test_unsolvable(self):
+        self.assertEqual(solution.count_solutions('22' + '.' * 79), 0)
+
+    def test_board_unchanged(self):
+        board = solution.grid2board(self.diagonal_grid)
+        solution.count_solutions(board)
+        self.assertEqual(board.to_grid(), self.diagonal_grid)
+
+    def test_parallel(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid, workers=2), 1)
+        self.assertEqual(solution.count_solutions('.' * 81, limit=4, workers=2), 4)
+
+    def test_parallel_board(self):
+        # the geometry of a board comes from its tables
+        board = solution.grid2board('.' * 16, n=2, diagonal=False)
+        self.assertEqual(board.tables.key, (2, False))
+        self.assertEqual(solution.count_solutions(board, limit=5, workers=2), 5)
+        geometry = solution.make_geometry(2, diagonal=False)
+        tables = solution.bitboard.BoardTables(geometry.boxes, geometry.unitlist, geometry.digits)
+        with self.assertRaises(ValueError):
+            solution.count_solutions(solution.bitboard.BitBoard(tables, board.cells), workers=2)
+
+
+class TestHistory(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_replay(self):
+        history = solution.History()
+        result = solution.solve(self.diagonal_grid, history=history)
+        self.assertEqual(result, TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertTrue(len(history) > 0)
+        values = solution.grid2values(self.diagonal_grid)
+        for box, candidates in history.assignments():
+            values[box] = candidates
+        self.assertEqual(values, result)
+
+    def test_disabled(self):
+        board = solution.grid2board(self.diagonal_grid)
+        self.assertIs(type(board.cells), list)
+        self.assertIs(type(board.copy().cells), list)
+        observed = board.observe(solution.History())
+        self.assertIsInstance(observed.copy().cells, solution.bitboard.ObservedCells)
+
+
+class TestGeometry(unittest.TestCase):
+
+    def test_standard_board(self):
+        geometry = solution.make_geometry(3, diagonal=True)
+        self.assertEqual(geometry.boxes, solution.boxes)
+        self.assertEqual(len(geometry.unitlist), 29)
+        self.assertEqual(len(geometry.peers['A1']), 26)
+        self.assertEqual(len(geometry.peers['A2']), 20)
+
+    def test_large_boards(self):
+        for n in (4, 5):
+            geometry = solution.make_geometry(n, diagonal=False)
+            size = n * n
+            self.assertEqual(len(geometry.boxes), size * size)
+            self.assertEqual(len(geometry.unitlist), 3 * size)
+            self.assertEqual(len(geometry.peers['A1']), 3 * size - 2 * n - 1)
+
+    def test_solve_16x16(self):
+        n, size, digits = 4, 16, solution.make_geometry(4).digits
+        # a valid board from the standard shifted-row pattern, with every
+        # other box blanked out
+        solved = ''.join(digits[(n * (r % n) + r // n + c) % size]
+                         for r in range(size) for c in range(size))
+        grid = ''.join(d if i % 2 else '.' for i, d in enumerate(solved))
+        board = solution.bitboard.search(solution.grid2board(grid, n=4, diagonal=False))
+        result = board.to_grid()
+        self.assertTrue(all(g in ('.', r) for g, r in zip(grid, result)))
+        for unit in board.tables.units:
+            self.assertEqual(sorted(result[i] for i in unit), sorted(digits))
+
+
+class TestStrategies(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def empty_board(self):
+        return solution.grid2board('.' * 81)
+
+    def test_pointing_pairs(self):
+        board = self.empty_board()
+        one = board.tables.bit['1']
+        for box in ('B1', 'B2', 'B3', 'C1', 'C2', 'C3'):
+            board.cells[board.tables.index[box]] &= ~one
+        remove = strategies.Remover(board)
+        strategies.pointing_pairs(board, remove)
+        for box in solution.cross('A', '456789'):
+            self.assertFalse(board.cells[board.tables.index[box]] & one)
+        self.assertTrue(board.cells[board.tables.index['A1']] & one)
+        self.assertEqual(remove.removed, 6)
+
+    def test_naked_pairs(self):
+        before = TestNakedTwins.before_naked_twins_1
+        board = solution.BitBoard.from_values(before, solution.board_tables)
+        strategies.PASSES['naked_pairs'](board, strategies.Remover(board))
+        self.assertEqual(board.to_values()['E3'], '79')
+
+    def test_pipeline(self):
+        pipeline = strategies.Pipeline()
+        self.assertEqual(solution.solve(self.diagonal_grid, passes=pipeline),
+                         TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertEqual(list(pipeline.stats), list(strategies.PASSES))
+        self.assertTrue(all(stats.calls > 0 for stats in pipeline.stats.values()))
+
+    def test_configured_pipeline(self):
+        pipeline = strategies.Pipeline(['x_wing'])
+        self.assertEqual(solution.solve(self.diagonal_grid, trail=True, passes=pipeline),
+                         TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertEqual(list(pipeline.stats), ['x_wing'])
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_corpora(self):
+        for name, (filename, diagonal) in benchmark.CORPORA.items():
+            for grid in benchmark.load_corpus(os.path.join(benchmark.PUZZLE_DIR, filename)):
+                self.assertEqual(solution.count_solutions(grid, diagonal=diagonal), 1)
+
+    def test_benchmark_corpus(self):
+        grids = [TestDiagonalSudoku.diagonal_grid]
+        result = benchmark.benchmark_corpus(grids, True, ['dict', 'search', 'dlx'])
+        self.assertEqual(list(result['solve']), ['dict', 'search', 'dlx'])
+        self.assertEqual(list(result['reduce_puzzle']), ['bitboard', 'dict'])
+        self.assertIn('x_wing', result['strategies'])
+        self.assertTrue(result['propagation_steps']['total'] > 0)
+
+
+class TestSolveMany(unittest.TestCase):
+    grids = [TestDiagonalSudoku.diagonal_grid, '22' + '.' * 79] * 3
+    expected = [solution.values2grid(TestDiagonalSudoku.solved_diag_sudoku), None] * 3
+
+    def test_serial(self):
+        self.assertEqual(list(solution.solve_many(iter(self.grids), workers=1)), self.expected)
+
+    def test_pool_keeps_order(self):
+        results = solution.solve_many(iter(self.grids), workers=2, chunksize=1)
+        self.assertEqual(list(results), self.expected)
+
+
 if __name__ == '__main__':
     unittest.main()
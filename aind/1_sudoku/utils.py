@@ -1,12 +1,20 @@
 
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
 
+# symbols used for the row labels and the digits of boards up to 25x25
+ROW_LABELS = 'ABCDEFGHIJKLMNOPQRSTUVWXY'
+DIGITS = '123456789ABCDEFGHIJKLMNOP'
+
 rows = 'ABCDEFGHI'
 cols = '123456789'
 boxes = [r + c for r in rows for c in cols]
 history = {}  # history must be declared here so that it exists in the assign_values scope
 
+Geometry = namedtuple('Geometry', ['n', 'rows', 'cols', 'digits', 'boxes', 'row_units',
+                                   'column_units', 'square_units', 'diagonal_units',
+                                   'unitlist', 'units', 'peers'])
+
 
 def extract_units(unitlist, boxes):
     """Initialize a mapping from box names to the units that the boxes belong to
@@ -66,6 +74,49 @@ def extract_peers(units, boxes):
     return peers
 
 
+def make_geometry(n=3, diagonal=True):
+    """Generate the boxes, units and peers of a Sudoku board with n x n squares
+
+    Parameters
+    ----------
+    n(int)
+        the size of a square, giving a board of n**2 rows and n**2 columns
+        (n=3 is the standard 9x9 board; n may be at most 5)
+
+    diagonal(bool)
+        if True, the two main diagonals are added to the unitlist
+
+    Returns
+    -------
+    Geometry
+        a namedtuple with the row labels, column labels, digits and boxes of
+        the board, the units by kind, the full unitlist, and the units and
+        peers dictionaries built by `extract_units` and `extract_peers`
+    """
+    size = n * n
+    if not 1 < n <= 5:
+        raise ValueError("Boards are supported for square sizes 2 to 5, got {}".format(n))
+    board_rows = ROW_LABELS[:size]
+    board_cols = [str(c) for c in range(1, size + 1)]
+    board_boxes = cross(board_rows, board_cols)
+
+    row_units = [cross(r, board_cols) for r in board_rows]
+    column_units = [cross(board_rows, [c]) for c in board_cols]
+    row_bands = [board_rows[i:i + n] for i in range(0, size, n)]
+    col_stacks = [board_cols[i:i + n] for i in range(0, size, n)]
+    square_units = [cross(rs, cs) for rs in row_bands for cs in col_stacks]
+    diagonal_units = []
+    if diagonal:
+        diagonal_units = [[r + c for r, c in zip(board_rows, board_cols)],
+                          [r + c for r, c in zip(board_rows, board_cols[::-1])]]
+    unitlist = row_units + column_units + square_units + diagonal_units
+
+    units = extract_units(unitlist, board_boxes)
+    peers = extract_peers(units, board_boxes)
+    return Geometry(n, board_rows, board_cols, DIGITS[:size], board_boxes, row_units,
+                    column_units, square_units, diagonal_units, unitlist, units, peers)
+
+
 def assign_value(values, box, value):
     """You must use this function to update your values dictionary if you want to
     try using the provided visualization tool. This function records each assignment
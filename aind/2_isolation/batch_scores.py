@@ -0,0 +1,112 @@
+"""Batched evaluation of the children of a search node.
+
+At the last ply of a search every child of a node is built with
+`forecast_move`, checked with `terminal_test` and scored with a heuristic that
+calls `get_legal_moves` for both players, building lists (and sets) of moves
+for each leaf.  The heuristics of `sample_players.py` and `game_agent.py` only
+depend on the moves of the two players and on the location of the player, so
+`score_children` computes them for all the children of a node at once from
+the bitboards returned by `Board.child_masks`: mobility is a popcount, and
+the intersection and union of the move sets are a bitwise AND and OR.
+
+The values are exactly those the search would compute one child at a time,
+including the infinite values of children where the player to move has no
+legal moves.  Heuristics without a batched version are looked up by module
+and function name in `BATCHED`, and `score_children` returns None for the
+others so the caller can fall back on scoring the children one by one.
+"""
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def _open_move(own, opp, loc, game):
+    return float(popcount(own))
+
+
+def _improved(own, opp, loc, game):
+    return float(popcount(own) - popcount(opp))
+
+
+def _center(own, opp, loc, game):
+    w, h = game.width / 2., game.height / 2.
+    y, x = loc
+    return float((h - y)**2 + (w - x)**2)
+
+
+def _custom(own, opp, loc, game):
+    return float(popcount(own) - 2 * popcount(opp))
+
+
+def _custom_2(own, opp, loc, game):
+    union = popcount(own | opp)
+    return float(1 - popcount(own & opp) / union) if union > 0 else float("inf")
+
+
+def _custom_3(own, opp, loc, game):
+    intersect = popcount(own & opp)
+    return float(1.0 / intersect) if intersect > 0 else float(2 * (popcount(own) - popcount(opp)))
+
+
+# (module, function name) of a heuristic -> fn(own, opp, loc, game) scoring
+# a non-terminal child from the bitboards of the legal moves of the player
+# (own) and of its opponent (opp), and the (row, column) of the player
+BATCHED = {
+    ("sample_players", "open_move_score"): _open_move,
+    ("sample_players", "improved_score"): _improved,
+    ("sample_players", "center_score"): _center,
+    ("game_agent", "custom_score"): _custom,
+    ("game_agent", "custom_score_2"): _custom_2,
+    ("game_agent", "custom_score_3"): _custom_3,
+}
+
+
+def register(score_fn, batched_fn):
+    """Add the batched version of a heuristic (see `BATCHED`) """
+    BATCHED[(score_fn.__module__, score_fn.__name__)] = batched_fn
+
+
+def score_children(game, player, moves, score_fn):
+    """Return the values of the children of a node at the search frontier
+
+    Parameters
+    ----------
+    game : isolation.Board
+        The position of the node
+
+    player : object
+        The player whose point of view the values are computed from
+
+    moves : list<(int, int)>
+        The legal moves of the active player
+
+    score_fn : callable
+        The heuristic
+
+    Returns
+    -------
+    list<float> or None
+        For each move, -inf or +inf if the player or the opponent has no
+        legal moves after it (the player to move loses) and otherwise
+        `score_fn` of the board after the move; None if `score_fn` has no
+        batched version
+    """
+    batched = BATCHED.get((getattr(score_fn, "__module__", None),
+                           getattr(score_fn, "__name__", None)))
+    if batched is None:
+        return None
+
+    moving = player == game.active_player
+    terminal = float("inf") if moving else float("-inf")
+    if not moving:
+        loc = game.get_player_location(player)
+    values = []
+    for move, (mover, following) in zip(moves, game.child_masks(moves)):
+        if not following:
+            values.append(terminal)
+        elif moving:
+            values.append(batched(mover, following, move, game))
+        else:
+            values.append(batched(following, mover, loc, game))
+    return values
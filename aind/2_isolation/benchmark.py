@@ -0,0 +1,267 @@
+"""Benchmark the isolation agents.
+
+    $ python benchmark.py time
+    $ python benchmark.py time --games 10 --time-limit 150 --seed 3 --json results.json
+    $ python benchmark.py movegen
+
+`time` benchmarks the time management of the iterative deepening of
+AlphaBetaPlayer: it searches the positions of recorded games with and
+without a `TimeManager` and reports, per move, the time used, the time
+wasted on iterations thrown away, the depth completed and the time left when
+the move was returned.  The games are played once by two players without
+time management, from random openings.  Every configuration then replays
+them: a player of the configuration searches every position of its side in
+order (so its transposition table carries over between turns as in a game)
+and the move of the recorded game is played whatever it chose, so every
+configuration searches the same positions.
+
+Without time management most of the last iteration of every turn is wasted;
+with it, the player stops before iterations predicted not to complete (or
+after proving the game won or lost) and keeps the best move of an iteration
+aborted by the timer once the first root move has been searched.  The depth
+is compared on the positions that no configuration proved won or lost, since
+a search without time management keeps deepening proven positions until the
+timer expires.
+
+`movegen` times the board primitives (`get_legal_moves`, `move_is_legal`,
+`forecast_move`) and fixed-depth alpha-beta searches with each move
+generation backend of `isolation.py` (the table-driven `isolation/movegen.py`
+and the plain bitboard code).  The backend is chosen when `isolation` is
+imported, so every backend runs in its own process (with the environment
+variable `ISOLATION_MOVEGEN` set); each process also plays a few seeded games
+and reports a digest of their moves, which must be the same for every
+backend.
+
+With `--json -` the results are only written to stdout as JSON, without the
+text report.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import timeit
+from collections import OrderedDict
+
+from isolation import Board, isolation
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+from search_stats import SearchStats
+from tournament import choose_opening
+
+# configuration name -> keyword arguments of AlphaBetaPlayer
+CONFIGS = OrderedDict([
+    ('fixed', {'time_manager': False}),
+    ('managed', {'time_manager': True}),
+])
+
+INFINITY = float("inf")
+
+
+def record_games(games, time_limit, seed):
+    """Play games between two players without time management
+
+    Returns
+    -------
+    list<list<(int, int)>>
+        The moves of every game, opening included
+    """
+    rng = random.Random(seed)
+    records = []
+    for _ in range(games):
+        opening = choose_opening(rng)
+        random.seed(rng.getrandbits(32))
+        game = Board(*[AlphaBetaPlayer(score_fn=improved_score, time_manager=False)
+                       for _ in range(2)])
+        for move in opening:
+            game.apply_move(move)
+        _, history, _ = game.play(time_limit=time_limit)
+        records.append(list(opening) + [tuple(move) for move in history if move != [-1, -1]])
+    return records
+
+
+def replay(config, moves, time_limit):
+    """Search every position of a recorded game (after the opening) with
+    players of a configuration
+
+    Returns
+    -------
+    list<dict>
+        For every position: the depth completed, the milliseconds used,
+        wasted and left, and whether the move came from an aborted iteration
+        or the root value was proven
+    """
+    stats = SearchStats()
+    players = [AlphaBetaPlayer(score_fn=improved_score, stats=stats, **CONFIGS[config])
+               for _ in range(2)]
+    game = Board(*players)
+    results = []
+    for i, move in enumerate(moves):
+        if i >= 2 and game.get_legal_moves():
+            player = game.active_player
+            wasted, partial = stats.wasted, stats.partial_moves
+            start = timeit.default_timer()
+            player.get_move(game.copy(), lambda: time_limit - 1000 * (timeit.default_timer() - start))
+            results.append({
+                'depth': stats.depths[-1],
+                'used': 1000 * (timeit.default_timer() - start),
+                'wasted': 1000 * (stats.wasted - wasted),
+                'left': stats.margins[-1],
+                'partial': stats.partial_moves > partial,
+                'proven': player.root_value in (INFINITY, -INFINITY),
+            })
+        game.apply_move(move)
+    return results
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else 0
+
+
+def benchmark(games, time_limit, seed):
+    """Return the summary of every configuration on the positions of
+    `games` recorded games
+    """
+    records = record_games(games, time_limit, seed)
+    positions = OrderedDict((config, [result for moves in records
+                                      for result in replay(config, moves, time_limit)])
+                            for config in CONFIGS)
+    # positions proven won or lost by some configuration
+    proven = [any(results[i]['proven'] for results in positions.values())
+              for i in range(len(positions['fixed']))]
+    summary = OrderedDict()
+    for config, results in positions.items():
+        moves = len(results)
+        summary[config] = OrderedDict([
+            ('moves', moves),
+            ('used_per_move', sum(r['used'] for r in results) / moves),
+            ('wasted_per_move', sum(r['wasted'] for r in results) / moves),
+            ('median_depth', median(r['depth'] for r, p in zip(results, proven) if not p)),
+            ('partial_moves', sum(r['partial'] for r in results)),
+            ('min_left', min(r['left'] for r in results)),
+            ('overruns', sum(r['left'] < 0 for r in results)),
+        ])
+    return summary
+
+
+def print_report(summary, time_limit):
+    print("{:<10}{:>7}{:>10}{:>10}{:>8}{:>9}{:>10}{:>10}".format(
+        "", "Moves", "Used ms", "Wasted", "Depth", "Partial", "Min left", "Overruns"))
+    for config, s in summary.items():
+        print("{:<10}{:>7}{:>10.1f}{:>10.1f}{:>8}{:>9}{:>10.1f}{:>10}".format(
+            config, s['moves'], s['used_per_move'], s['wasted_per_move'], s['median_depth'],
+            s['partial_moves'], s['min_left'], s['overruns']))
+    print("\n{} ms per move; wasted: time spent in iterations whose result was thrown away;"
+          "\ndepth: median over the positions not proven won or lost".format(time_limit))
+
+
+def time_primitives(repeat=5, number=20000):
+    """Return the best time (in microseconds) of the board primitives, the
+    best time (in milliseconds) of fixed-depth searches and a digest of the
+    moves of seeded games, with the backend this process imported
+    """
+    random.seed(0)
+    game = Board("Player1", "Player2")
+    for _ in range(10):
+        game.apply_move(random.choice(game.get_legal_moves()))
+    move = game.get_legal_moves()[0]
+    primitives = OrderedDict([
+        ('get_legal_moves', lambda: game.get_legal_moves()),
+        ('move_is_legal', lambda: game.move_is_legal(move)),
+        ('forecast_move', lambda: game.forecast_move(move)),
+    ])
+    results = OrderedDict(
+        (name, 1e6 * min(timeit.repeat(fn, number=number, repeat=repeat)) / number)
+        for name, fn in primitives.items())
+
+    def search():
+        random.seed(1)
+        player = AlphaBetaPlayer(score_fn=improved_score, tt_size=None, batch_eval=False,
+                                 endgame=False, time_manager=False)
+        player.time_left = lambda: float("inf")
+        board = Board(player, "Opponent")
+        board.apply_move((3, 3))
+        board.apply_move((2, 4))
+        for depth in range(1, 8):
+            player.alphabeta(board, depth)
+    results['search'] = 1000 * min(timeit.repeat(search, number=1, repeat=repeat))
+
+    # games without time limits, so the moves only depend on the seed
+    digest = hashlib.sha1()
+    for seed in range(3):
+        random.seed(seed)
+        players = [AlphaBetaPlayer(score_fn=improved_score, search_depth=3, time_manager=False)
+                   for _ in range(2)]
+        board = Board(*players)
+        for player in players:
+            player.time_left = lambda: float("inf")
+        while board.get_legal_moves():
+            board.apply_move(board.active_player.alphabeta(board, 3))
+        digest.update(repr(board.to_string()).encode())
+    results['games_digest'] = digest.hexdigest()[:12]
+    return results
+
+
+def benchmark_movegen(backends=('python', 'table')):
+    """Return the results of `time_primitives` for every backend, each run
+    in a new process
+    """
+    results = OrderedDict()
+    for backend in backends:
+        env = dict(os.environ, ISOLATION_MOVEGEN=backend)
+        out = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), 'movegen', '--in-process', '--json', '-'],
+            env=env)
+        results[backend] = json.loads(out.decode())
+    return results
+
+
+def print_movegen_report(results):
+    print("{:<18}".format("backend") + "".join("{:>14}".format(r['backend'])
+                                             for r in results.values()))
+    for name, unit in (('get_legal_moves', 'us'), ('move_is_legal', 'us'),
+                       ('forecast_move', 'us'), ('search', 'ms')):
+        print("{:<18}".format(name) + "".join("{:>14}".format("{:.3f} {}".format(r[name], unit))
+                                             for r in results.values()))
+    print("{:<18}".format('games_digest') + "".join("{:>14}".format(r['games_digest'])
+                                                  for r in results.values()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('suite', nargs='?', choices=['time', 'movegen'], default='time',
+                        help="what to benchmark (default: time)")
+    parser.add_argument('--games', type=int, default=4, help="number of games recorded")
+    parser.add_argument('--time-limit', type=int, default=150,
+                        help="number of milliseconds allowed for each move")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the openings")
+    parser.add_argument('--in-process', action='store_true',
+                        help="(movegen) only time the backend imported by this process")
+    parser.add_argument('--json', metavar='PATH',
+                        help="also write the results to a JSON file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    report = args.json != '-'
+    if args.suite == 'movegen' and args.in_process:
+        results = time_primitives()
+        results['backend'] = isolation.MOVEGEN
+    elif args.suite == 'movegen':
+        results = benchmark_movegen()
+        if report:
+            print_movegen_report(results)
+    else:
+        results = benchmark(args.games, args.time_limit, args.seed)
+        if report:
+            print_report(results, args.time_limit)
+    if args.json == '-':
+        json.dump(results, sys.stdout, indent=2)
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
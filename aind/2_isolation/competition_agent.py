@@ -6,10 +6,9 @@ champions) in a tournament.
 """
 import random
 
-
-class SearchTimeout(Exception):
-    """Subclass base exception for code clarity. """
-    pass
+from batch_scores import popcount, register
+from game_agent import AlphaBetaPlayer, SearchTimeout
+from opening_book import OpeningBook
 
 
 def custom_score(game, player):
@@ -33,10 +32,21 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    raise NotImplementedError
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
+
+    own_moves = len(game.get_legal_moves(player))
+    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    return float(own_moves - 2 * opp_moves)
 
 
-class CustomPlayer:
+register(custom_score, lambda own, opp, loc, game: float(popcount(own) - 2 * popcount(opp)))
+
+
+class CustomPlayer(AlphaBetaPlayer):
     """Game-playing agent to use in the optional player vs player Isolation
     competition.
 
@@ -51,20 +61,28 @@ class CustomPlayer:
 
     Parameters
     ----------
-    data : string
-        The name of the search method to use in get_move().
+    data : OpeningBook or string (optional)
+        An opening book, or the path of an opening book file written by
+        opening_book.py (e.g., "opening_book.json"), to play the first
+        moves of the game from.
 
     timeout : float (optional)
         Time remaining (in milliseconds) when search is aborted.  Note that
         the PvP competition uses more accurate timers that are not cross-
         platform compatible, so a limit of 1ms (vs 10ms for the other classes)
         is generally sufficient.
+
+    The agent plays the moves of the opening book while the position is in
+    the book and the moves of an `EndgameSolver` once the players are
+    separated. In between, it uses iterative deepening alpha-beta search
+    (with the transposition table, move ordering and batched evaluation of
+    `AlphaBetaPlayer`) with `custom_score`.
     """
 
     def __init__(self, data=None, timeout=1.):
-        self.score = custom_score
-        self.time_left = None
-        self.TIMER_THRESHOLD = timeout
+        AlphaBetaPlayer.__init__(self, score_fn=custom_score, timeout=timeout)
+        self.data = data
+        self.book = OpeningBook.load(data) if isinstance(data, str) else data
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -93,5 +111,8 @@ class CustomPlayer:
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        # OPTIONAL: Finish this function!
-        raise NotImplementedError
+        if self.book is not None:
+            move = self.book.lookup(game)
+            if move is not None and game.move_is_legal(move):
+                return move
+        return AlphaBetaPlayer.get_move(self, game, time_left)
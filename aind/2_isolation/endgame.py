@@ -0,0 +1,160 @@
+"""Exact endgame play for isolation.
+
+Once no cell can be reached by both players, the players can no longer
+interfere with each other: each one moves inside its own region of the board
+and the game is decided by the length of the longest path (sequence of knight
+moves over open cells) each player can make.  The player to move loses if
+its longest path is not longer than the opponent's, so its best move is
+always the first move of its longest path, which `EndgameSolver` finds with a
+memoized depth-first search.
+
+The regions are found by flood filling the bitboard of the open cells from
+each player's location (see `Board.bitboards`).
+"""
+from isolation import board_tables
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def reachable(knight_masks, idx, blank):
+    """Return the bitboard of the open cells a knight standing on cell `idx`
+    can reach through open cells.
+    """
+    region = 0
+    frontier = knight_masks[idx] & blank
+    while frontier:
+        region |= frontier
+        new = 0
+        while frontier:
+            bit = frontier & -frontier
+            new |= knight_masks[bit.bit_length() - 1]
+            frontier ^= bit
+        frontier = new & blank & ~region
+    return region
+
+
+def regions(game):
+    """Return the bitboards of the open cells reachable by the active and the
+    inactive player of a game, or None if a player has not moved yet.
+    """
+    blank, active, inactive = game.bitboards()
+    if active is None or inactive is None:
+        return None
+    knight_masks, _ = board_tables(game.width, game.height)
+    return reachable(knight_masks, active, blank), reachable(knight_masks, inactive, blank)
+
+
+def is_partitioned(game):
+    """Return True if the regions reachable by the two players of a game are
+    disjoint (and both players have moved).
+    """
+    reach = regions(game)
+    return reach is not None and not reach[0] & reach[1]
+
+
+class EndgameSolver(object):
+    """Longest path search for partitioned isolation games.
+
+    The results are memoized by (cell, open cells reachable from it), so the
+    table built while solving one turn also solves the following turns.
+
+    Parameters
+    ----------
+    max_cells : int (optional)
+        The size of the largest region solved; the time taken grows very
+        quickly with it (on a 7x7 board, regions of 24 cells usually take
+        tens of milliseconds, and regions of 28 cells take seconds).
+
+    max_memo : int (optional)
+        The number of positions memoized before the table is cleared.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of positions searched (not found in the table).
+    """
+    def __init__(self, max_cells=24, max_memo=2**20):
+        self.max_cells = max_cells
+        self.max_memo = max_memo
+        self.memo = {}
+        self.nodes = 0
+        self.check = None
+
+    def solve(self, game, check=None):
+        """Find the best move of the active player of a partitioned game.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The current game state
+
+        check : callable (optional)
+            Called every 64 positions searched; it can abort the search by
+            raising `SearchTimeout`
+
+        Returns
+        -------
+        ((int, int), int, int) or None
+            The best move, the length of the active player's longest path
+            (including the move) and that of the inactive player, or None if
+            the game is not partitioned (or a region has more than
+            `max_cells` cells). The active player wins if and only if its
+            path is the longer one.
+        """
+        reach = regions(game)
+        if (reach is None or reach[0] & reach[1] or
+                max(popcount(reach[0]), popcount(reach[1])) > self.max_cells):
+            return None
+        if len(self.memo) > self.max_memo:
+            self.memo = {}
+        self.check = check
+        blank, active, inactive = game.bitboards()
+        knight_masks, coords = board_tables(game.width, game.height)
+        best_length, best_move = 0, None
+        for _, idx in self.ranked_moves(knight_masks, active, blank):
+            length = 1 + self.longest_path(knight_masks, idx, blank & ~(1 << idx))
+            if length > best_length:
+                best_length, best_move = length, coords[idx]
+        return best_move, best_length, self.longest_path(knight_masks, inactive, blank)
+
+    def ranked_moves(self, knight_masks, idx, blank):
+        """Return the (onward moves, cell) of the moves from a cell, fewest
+        onward moves first (Warnsdorff's rule finds long paths early)
+        """
+        moves = []
+        mask = knight_masks[idx] & blank
+        while mask:
+            bit = mask & -mask
+            j = bit.bit_length() - 1
+            moves.append((popcount(knight_masks[j] & blank), j))
+            mask ^= bit
+        moves.sort()
+        return moves
+
+    def longest_path(self, knight_masks, idx, blank):
+        """Return the number of moves of the longest path of a knight
+        standing on cell `idx` through the open cells of `blank`.
+        """
+        # only the open cells reachable from idx matter, which lets positions
+        # differing elsewhere (e.g., in the opponent's region) share results
+        region = reachable(knight_masks, idx, blank)
+        key = (idx, region)
+        if key in self.memo:
+            return self.memo[key]
+        self.nodes += 1
+        if self.check is not None and not self.nodes & 63:
+            self.check()
+
+        # no path is longer than the number of cells in the region
+        bound = popcount(region)
+        best = 0
+        for _, j in self.ranked_moves(knight_masks, idx, region):
+            length = 1 + self.longest_path(knight_masks, j, region & ~(1 << j))
+            if length > best:
+                best = length
+                if best == bound:
+                    break
+        self.memo[key] = best
+        return best
@@ -2,8 +2,19 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+import gc
 import random
 
+from batch_scores import score_children
+from endgame import EndgameSolver
+from move_ordering import MoveOrderer
+from time_manager import TimeManager
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# XORed into the transposition table keys of the positions searched by the
+# second player, since values are stored from the searching player's view
+PERSPECTIVE_SALT = 0x5bd1e9955bd1e995
+
 
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
@@ -123,6 +134,22 @@ def custom_score_3(game, player):
     return float(1.0/len(intersect)) if len(intersect) > 0 else float(2 * (len(own_moves) - len(opp_moves)))
 
 
+def make_move(game, move, in_place):
+    """Return the board after `move`: `game` itself, updated with
+    `game.push(move)`, when searching in place, otherwise a forecast copy.
+    """
+    if in_place:
+        game.push(move)
+        return game
+    return game.forecast_move(move)
+
+
+def unmake_move(game, in_place):
+    """Revert a move made by `make_move` """
+    if in_place:
+        game.pop()
+
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
@@ -156,8 +183,25 @@ class MinimaxPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using depth-limited minimax
     search. You must finish and test this player to make sure it properly uses
     minimax to return a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        Search with `Board.push`/`Board.pop` on a copy of the board made once
+        per search rather than with `Board.forecast_move` at every node.
+
+    stats : `search_stats.SearchStats` or None (optional)
+        A collector recording the statistics of every search.
     """
 
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10., in_place=False,
+                 stats=None):
+        IsolationPlayer.__init__(self, search_depth, score_fn, timeout)
+        # search by pushing and popping moves on a single board instead of
+        # copying the board at every node
+        self.in_place = in_place
+        self.stats = stats
+
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
         result before the time limit expires.
@@ -187,6 +231,8 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        if self.stats is not None:
+            self.stats.start_move()
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -195,11 +241,16 @@ class MinimaxPlayer(IsolationPlayer):
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            best_move = self.minimax(game, self.search_depth)
+            if self.stats is not None:
+                self.stats.end_move(self.search_depth, time_left())
+            return best_move
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
 
+        if self.stats is not None:
+            self.stats.end_move(0, time_left(), timed_out=True)
         # Return the best move from the last completed search iteration
         return best_move
 
@@ -209,6 +260,8 @@ class MinimaxPlayer(IsolationPlayer):
         """
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        if self.stats is not None:
+            self.stats.nodes += 1
 
         moves_available = bool(game.get_legal_moves())  # by Assumption 1
         return not moves_available
@@ -225,7 +278,8 @@ class MinimaxPlayer(IsolationPlayer):
             return self.score(game, self)
         v = float("inf")
         for m in game.get_legal_moves():
-            v = min(v, self.max_value(game.forecast_move(m), depth-1))
+            v = min(v, self.max_value(make_move(game, m, self.in_place), depth-1))
+            unmake_move(game, self.in_place)
         return v
     
     
@@ -240,7 +294,8 @@ class MinimaxPlayer(IsolationPlayer):
             return self.score(game, self)
         v = float("-inf")
         for m in game.get_legal_moves():
-            v = max(v, self.min_value(game.forecast_move(m), depth-1))
+            v = max(v, self.min_value(make_move(game, m, self.in_place), depth-1))
+            unmake_move(game, self.in_place)
         return v
 
     def minimax(self, game, depth):
@@ -285,11 +340,17 @@ class MinimaxPlayer(IsolationPlayer):
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
 
+        if self.in_place:
+            # a timeout leaves moves pushed on the board, so search a copy
+            game = game.copy()
+
         best_value = float("-inf")
         best_move = (-1, -1)
         for m in game.get_legal_moves():
-            v = self.min_value(game.forecast_move(m), depth-1)
-            if v > best_value:
+            v = self.min_value(make_move(game, m, self.in_place), depth-1)
+            unmake_move(game, self.in_place)
+            # a lost position still needs a legal move
+            if v > best_value or best_move == (-1, -1):
                 best_value = v
                 best_move = m
         return best_move
@@ -300,8 +361,68 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        Search with `Board.push`/`Board.pop` on a copy of the board made once
+        per search rather than with `Board.forecast_move` at every node.
+
+    tt_size : int or None (optional)
+        The number of slots of the transposition table kept across the
+        iterations of iterative deepening and across turns; None disables
+        the table.
+
+    ordering : bool (optional)
+        Order the moves of every node with a `MoveOrderer` (PV move, killer
+        moves and history heuristic) rather than only trying the move stored
+        in the transposition table first.
+
+    batch_eval : bool (optional)
+        Score all the children of the nodes one ply above the search horizon
+        at once with `batch_scores.score_children`, when the score function
+        has a batched version.
+
+    endgame : bool (optional)
+        Once the players can no longer reach a common cell, play the first
+        move of the longest path found by an `EndgameSolver`, which spends at
+        most half of the time left on it before falling back on search.
+
+    stats : `search_stats.SearchStats` or None (optional)
+        A collector recording the statistics of every search.
+
+    time_manager : bool or `TimeManager` (optional)
+        Stop deepening when a `TimeManager` predicts that the next iteration
+        cannot complete in the time left or when the value of the root is
+        proven, and play the best move of an iteration aborted by the timer
+        once its first root move has been searched.  A `TimeManager` passed
+        here is used instead of a default one, e.g.
+        `TimeManager(pause_gc=True)` to pause the garbage collector during
+        the search.
     """
 
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10., in_place=False,
+                 tt_size=2**16, ordering=True, batch_eval=True, endgame=True, stats=None,
+                 time_manager=True):
+        IsolationPlayer.__init__(self, search_depth, score_fn, timeout)
+        # search by pushing and popping moves on a single board instead of
+        # copying the board at every node
+        self.in_place = in_place
+        self.tt = TranspositionTable(tt_size) if tt_size else None
+        self.orderer = MoveOrderer() if ordering else None
+        self.batch_eval = batch_eval
+        self.endgame = EndgameSolver() if endgame else None
+        self.stats = stats
+        if isinstance(time_manager, TimeManager):
+            self.time_manager = time_manager
+        else:
+            self.time_manager = TimeManager() if time_manager else None
+        # the best root move and value of the iteration in progress (or of
+        # the last one), once its first root move has been searched
+        self.root_move = None
+        self.root_value = None
+        self._salt = 0
+
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
         result before the time limit expires.
@@ -333,35 +454,164 @@ class AlphaBetaPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.orderer is not None:
+            self.orderer.new_search()
+        if self.stats is not None:
+            self.stats.start_move()
+
+        manager = self.time_manager
+        pause_gc = manager is not None and manager.pause_gc and gc.isenabled()
+        if pause_gc:
+            gc.disable()
+        try:
+            return self.iterative_deepening(game)
+        finally:
+            if pause_gc:
+                gc.enable()
+
+    def iterative_deepening(self, game):
+        """Return the best move found by the endgame solver or by iterative
+        deepening before the time left (`self.time_left()`) runs out.
+        """
+        time_left = self.time_left
+        self.root_move = self.root_value = None
+        if not game.get_legal_moves():
+            # the game is lost: every iteration would return at once without
+            # a root value, and deepen until the timer expires
+            if self.stats is not None:
+                self.stats.end_move(0, time_left())
+            return (-1, -1)
+        if self.endgame is not None:
+            move = self.endgame_move(game)
+            if move is not None:
+                if self.stats is not None:
+                    self.stats.end_move(0, time_left(), endgame=True)
+                return move
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
         best_move = (-1, -1)
 
+        manager = self.time_manager
+        if manager is not None:
+            manager.start(time_left())
+        depth = 1
+        timed_out = partial = False
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            depth = 1
             while True:
                 best_move = self.alphabeta(game, depth)
+                if self.stats is not None:
+                    self.stats.iteration(depth)
                 depth += 1
+                if manager is not None:
+                    manager.completed(time_left())
+                    if (self.root_value in (float("inf"), float("-inf")) or
+                            not manager.next_fits(time_left(), self.TIMER_THRESHOLD)):
+                        break
 
         except SearchTimeout:
-            pass  # Handle any actions required after timeout as needed
-
+            # Handle any actions required after timeout as needed
+            timed_out = True
+            if manager is not None and self.root_move is not None:
+                # the first root move of the aborted iteration is the best
+                # move of the last one, and any move found after it is better
+                best_move = self.root_move
+                partial = True
+
+        if self.stats is not None:
+            self.stats.end_move(depth - 1, time_left(), timed_out, partial=partial)
         # Return the best move from the last completed search iteration
         return best_move
 
+    def endgame_move(self, game):
+        """Return the best move of a partitioned game found by the endgame
+        solver with half of the time left, or None if the game is not
+        partitioned or the solver ran out of time.
+        """
+        stop = self.time_left() / 2
+
+        def check():
+            if self.time_left() < max(stop, self.TIMER_THRESHOLD):
+                raise SearchTimeout()
+
+        try:
+            result = self.endgame.solve(game, check)
+        except SearchTimeout:
+            return None
+        return result[0] if result is not None else None
+
     def terminal_test(self, game):
         """ Return True if the game is over for the active player
         and False otherwise.
         """
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        if self.stats is not None:
+            self.stats.nodes += 1
 
         moves_available = bool(game.get_legal_moves())  # by Assumption 1
         return not moves_available
     
+    def probe(self, game, depth, alpha, beta):
+        """Look up a position in the transposition table
+
+        Returns
+        -------
+        (int, float or None, (int, int) or None)
+            The key of the position, the stored value if it decides the
+            search of the position with the window (alpha, beta) to `depth`
+            plies, and the stored best move
+        """
+        key = game.hash() ^ self._salt
+        entry = self.tt.lookup(key)
+        if entry is None:
+            return key, None, None
+        _, entry_depth, flag, value, move, _ = entry
+        if entry_depth >= depth and (flag == EXACT or
+                                     (flag == LOWER and value >= beta) or
+                                     (flag == UPPER and value <= alpha)):
+            return key, value, move
+        return key, None, move
+
+    def store(self, key, depth, alpha, beta, value, move):
+        """Record the value found by searching a position with the window
+        (alpha, beta) in the transposition table
+        """
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, value, move)
+
+    def ordered_moves(self, game, first):
+        """Return the legal moves, trying the move `first` (if legal) first and
+        the others in the order given by the move orderer, if any
+        """
+        moves = game.get_legal_moves()
+        if self.orderer is not None:
+            return self.orderer.order(game, moves, first)
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def frontier_values(self, game, moves):
+        """Return the values of the children of a node one ply above the
+        search horizon, scored in a batch, or None if they must be searched
+        one by one
+        """
+        if not self.batch_eval:
+            return None
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+        return score_children(game, self, moves, self.score)
+
     def min_value(self, game, depth, alpha, beta):
         """ Return the value for a win (+1) if the game is over,
         otherwise return the minimum value over all legal child
@@ -371,12 +621,30 @@ class AlphaBetaPlayer(IsolationPlayer):
             return float("inf")
         if depth == 0:
             return self.score(game, self)
+        tt_move = best = None
+        if self.tt is not None:
+            key, value, tt_move = self.probe(game, depth, alpha, beta)
+            if value is not None:
+                return value
         v = float("inf")
-        for m in game.get_legal_moves():
-            v = min(v, self.max_value(game.forecast_move(m), depth-1, alpha, beta))
+        moves = self.ordered_moves(game, tt_move)
+        values = self.frontier_values(game, moves) if depth == 1 else None
+        for i, m in enumerate(moves):
+            if values is not None:
+                value = values[i]
+            else:
+                value = self.max_value(make_move(game, m, self.in_place), depth-1, alpha, min(beta, v))
+                unmake_move(game, self.in_place)
+            if best is None or value < v:
+                v, best = value, m
             if v <= alpha:
-                return v
-            beta = min(beta, v)
+                if self.orderer is not None:
+                    self.orderer.cutoff(game, m, depth, i, tt_move)
+                if self.stats is not None:
+                    self.stats.cutoffs += 1
+                break
+        if self.tt is not None:
+            self.store(key, depth, alpha, beta, v, best)
         return v
     
     
@@ -389,12 +657,30 @@ class AlphaBetaPlayer(IsolationPlayer):
             return float("-inf")
         if depth == 0:
             return self.score(game, self)
+        tt_move = best = None
+        if self.tt is not None:
+            key, value, tt_move = self.probe(game, depth, alpha, beta)
+            if value is not None:
+                return value
         v = float("-inf")
-        for m in game.get_legal_moves():
-            v = max(v, self.min_value(game.forecast_move(m), depth-1, alpha, beta))
+        moves = self.ordered_moves(game, tt_move)
+        values = self.frontier_values(game, moves) if depth == 1 else None
+        for i, m in enumerate(moves):
+            if values is not None:
+                value = values[i]
+            else:
+                value = self.min_value(make_move(game, m, self.in_place), depth-1, max(alpha, v), beta)
+                unmake_move(game, self.in_place)
+            if best is None or value > v:
+                v, best = value, m
             if v >= beta:
-                return v
-            alpha = max(alpha, v)
+                if self.orderer is not None:
+                    self.orderer.cutoff(game, m, depth, i, tt_move)
+                if self.stats is not None:
+                    self.stats.cutoffs += 1
+                break
+        if self.tt is not None:
+            self.store(key, depth, alpha, beta, v, best)
         return v
 
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
@@ -442,17 +728,39 @@ class AlphaBetaPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
+        self.root_move = self.root_value = None
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
 
+        if self.in_place:
+            # a timeout leaves moves pushed on the board, so search a copy
+            game = game.copy()
+
+        tt_move = None
+        if self.tt is not None:
+            # the root is searched by this player, whose side is given by
+            # the parity of the move count
+            self._salt = PERSPECTIVE_SALT if game.move_count % 2 else 0
+            key, _, tt_move = self.probe(game, depth, alpha, beta)
+        if tt_move is None and self.orderer is not None:
+            tt_move = self.orderer.pv_move
+        alpha_0 = alpha
+
         best_value = float("-inf")
         best_move = (-1, -1)
-        for m in game.get_legal_moves():
-            v = self.min_value(game.forecast_move(m), depth-1, alpha, beta)
-            if v > best_value:
+        for m in self.ordered_moves(game, tt_move):
+            v = self.min_value(make_move(game, m, self.in_place), depth-1, alpha, beta)
+            unmake_move(game, self.in_place)
+            # a lost position still needs a legal move
+            if v > best_value or best_move == (-1, -1):
                 best_value = v
                 best_move = m
+                self.root_move, self.root_value = m, v
             alpha = max(alpha, v)
+        if self.tt is not None and best_move != (-1, -1):
+            self.store(key, depth, alpha_0, beta, best_value, best_move)
+        if self.orderer is not None:
+            self.orderer.pv_move = best_move
         return best_move
 
 
@@ -7,12 +7,112 @@ You MAY use and modify this class, however ALL function signatures must
 remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
+import os
 import random
 import timeit
-from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+# (row, column) offsets of the L-shaped knight moves
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+_tables = {}
+
+
+def board_tables(width, height):
+    """Return the precomputed (cached) tables for a board size.
+
+    Cells are numbered `row + column * height` and cell `idx` is represented
+    by the bit `1 << idx` in a bitboard.
+
+    Returns
+    -------
+    (tuple, tuple)
+        the knight-move mask of every cell (the bits of the cells a knight
+        can reach from it), and the (row, column) coordinates of every cell
+    """
+    key = (width, height)
+    if key not in _tables:
+        knight_masks = []
+        coords = []
+        for idx in range(width * height):
+            r, c = idx % height, idx // height
+            mask = 0
+            for dr, dc in DIRECTIONS:
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    mask |= 1 << (r + dr + (c + dc) * height)
+            knight_masks.append(mask)
+            coords.append((r, c))
+        _tables[key] = (tuple(knight_masks), tuple(coords))
+    return _tables[key]
+
+
+_zobrist = {}
+
+# the move lists of the masks of legal moves converted by movegen.py, by board
+# size (shared by all the boards of that size)
+_move_lists = {}
+
+
+def zobrist_keys(width, height):
+    """Return the (cached) random keys used for Zobrist hashing on a board
+    size. The keys are drawn from a generator seeded with the board size, so
+    a position hashes to the same value in every process.
+
+    Returns
+    -------
+    (tuple, tuple, tuple, int)
+        a key per blocked cell, a key per location of player 1, a key per
+        location of player 2, and the key toggled with the initiative
+    """
+    key = (width, height)
+    if key not in _zobrist:
+        rng = random.Random("{}x{}".format(width, height))
+        size = width * height
+        blocked = tuple(rng.getrandbits(64) for _ in range(size))
+        p1_locs = tuple(rng.getrandbits(64) for _ in range(size))
+        p2_locs = tuple(rng.getrandbits(64) for _ in range(size))
+        _zobrist[key] = (blocked, p1_locs, p2_locs, rng.getrandbits(64))
+    return _zobrist[key]
+
+
+def mask_to_moves(mask, coords):
+    """Return the (row, column) coordinates of the cells set in a bitboard,
+    in increasing cell order.
+    """
+    moves = []
+    while mask:
+        bit = mask & -mask
+        moves.append(coords[bit.bit_length() - 1])
+        mask ^= bit
+    return moves
+
+
+def _legal_moves(mask, coords, move_lists):
+    return mask_to_moves(mask, coords)
+
+
+def _is_legal(move, blank, width, height, cells):
+    idx = move[0] + move[1] * height
+    return 0 <= move[0] < height and 0 <= move[1] < width and bool(blank >> idx & 1)
+
+
+# The table-driven move generation of movegen.py (see its docstring) is used
+# unless ISOLATION_MOVEGEN=python; both give identical results.
+MOVEGEN = os.environ.get("ISOLATION_MOVEGEN", "table")
+try:
+    if MOVEGEN != "table":
+        raise ImportError("table-driven move generation disabled")
+    from .movegen import (board_cells, legal_moves as _legal_moves, is_legal as _is_legal,
+                          shuffle as _shuffle)
+except ImportError:
+    MOVEGEN = "python"
+    _shuffle = random.shuffle
+
+    def board_cells(width, height):
+        return None
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -46,14 +146,28 @@ class Board(object):
         self._active_player = player_1
         self._inactive_player = player_2
 
-        # The last 3 entries of the board state includes initiative (0 for
-        # player 1, 1 for player 2) player 2 last move, and player 1 last move
-        self._board_state = [Board.BLANK] * (width * height + 3)
-        self._board_state[-1] = Board.NOT_MOVED
-        self._board_state[-2] = Board.NOT_MOVED
+        # The board state is a bitboard of the blank cells (bit idx is set
+        # when cell idx = row + column * height is open), the cell of each
+        # player's last move, and the initiative (0 for player 1, 1 for
+        # player 2). All of them are ints, so copying a board is O(1).
+        self._knight_masks, self._coords = board_tables(width, height)
+        self._cells = board_cells(width, height)
+        self._move_lists = _move_lists.setdefault((width, height), {})
+        self._blank = (1 << (width * height)) - 1
+        self._p1_loc = Board.NOT_MOVED
+        self._p2_loc = Board.NOT_MOVED
+        self._initiative = 0
+
+        # The Zobrist hash of the state is updated by every move
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._zobrist = 0
+
+        # (cell, previous location of the moving player, previous hash) of
+        # every move applied with push(), so pop() can revert them
+        self._history = []
 
     def hash(self):
-        return str(self._board_state).__hash__()
+        return self._zobrist
 
     @property
     def active_player(self):
@@ -92,11 +206,10 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
-        new_board.move_count = self.move_count
-        new_board._active_player = self._active_player
-        new_board._inactive_player = self._inactive_player
-        new_board._board_state = copy(self._board_state)
+        new_board = object.__new__(self.__class__)
+        state = self.__dict__.copy()
+        state["_history"] = self._history[:]
+        new_board.__dict__ = state
         return new_board
 
     def forecast_move(self, move):
@@ -132,15 +245,12 @@ class Board(object):
         bool
             Returns True if the move is legal, False otherwise
         """
-        idx = move[0] + move[1] * self.height
-        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
-                self._board_state[idx] == Board.BLANK)
+        return _is_legal(move, self._blank, self.width, self.height, self._cells)
 
     def get_blank_spaces(self):
         """Return a list of the locations that are still available on the board.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-                if self._board_state[i + j * self.height] == Board.BLANK]
+        return mask_to_moves(self._blank, self._coords)
 
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
@@ -156,20 +266,10 @@ class Board(object):
             The coordinate pair (row, column) of the input player, or None
             if the player has not moved.
         """
-        if player == self._player_1:
-            if self._board_state[-1] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-1]
-        elif player == self._player_2:
-            if self._board_state[-2] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-2]
-        else:
-            raise RuntimeError(
-                "Invalid player in get_player_location: {}".format(player))
-        w = idx // self.height
-        h = idx % self.height
-        return (h, w)
+        idx = self._player_idx(player)
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._coords[idx]
 
     def get_legal_moves(self, player=None):
         """Return the list of all legal moves for the specified player.
@@ -188,7 +288,7 @@ class Board(object):
         """
         if player is None:
             player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+        return self.__get_moves(self._player_idx(player))
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -200,20 +300,68 @@ class Board(object):
             the active player on the board.
         """
         idx = move[0] + move[1] * self.height
-        last_move_idx = int(self.active_player == self._player_2) + 1
-        self._board_state[-last_move_idx] = idx
-        self._board_state[idx] = 1
-        self._board_state[-3] ^= 1
+        blocked, p1_locs, p2_locs, initiative = self._zobrist_keys
+        z = self._zobrist ^ blocked[idx] ^ initiative
+        if self._active_player == self._player_2:
+            if self._p2_loc != Board.NOT_MOVED:
+                z ^= p2_locs[self._p2_loc]
+            z ^= p2_locs[idx]
+            self._p2_loc = idx
+        else:
+            if self._p1_loc != Board.NOT_MOVED:
+                z ^= p1_locs[self._p1_loc]
+            z ^= p1_locs[idx]
+            self._p1_loc = idx
+        self._zobrist = z
+        self._blank &= ~(1 << idx)
+        self._initiative ^= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def push(self, move):
+        """Apply a move in place, recording what is needed to revert it with
+        pop(). Searching with push()/pop() avoids copying the board at every
+        node of the game tree, unlike forecast_move().
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        if self._active_player == self._player_2:
+            loc = self._p2_loc
+        else:
+            loc = self._p1_loc
+        self._history.append((move[0] + move[1] * self.height, loc, self._zobrist))
+        self.apply_move(move)
+
+    def pop(self):
+        """Revert the last move applied with push().
+
+        Returns
+        -------
+        (int, int)
+            The coordinate pair (row, column) of the reverted move.
+        """
+        idx, loc, self._zobrist = self._history.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        if self._active_player == self._player_2:
+            self._p2_loc = loc
+        else:
+            self._p1_loc = loc
+        self._blank |= 1 << idx
+        self._initiative ^= 1
+        self.move_count -= 1
+        return self._coords[idx]
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self._has_moves(self._active_player)
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self._has_moves(self._active_player)
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +385,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self._has_moves(self._active_player):
 
             if player == self._inactive_player:
                 return float("inf")
@@ -247,19 +395,73 @@ class Board(object):
 
         return 0.
 
-    def __get_moves(self, loc):
+    def bitboards(self):
+        """Return the bitboard of the open cells and the cells of the active
+        and inactive players (NOT_MOVED before their first move). Cell idx is
+        bit `1 << idx` with idx = row + column * height; see board_tables()
+        for the knight moves of each cell.
+        """
+        return (self._blank, self._player_idx(self._active_player),
+                self._player_idx(self._inactive_player))
+
+    def child_masks(self, moves):
+        """Return the mobility of both players after each move of the active
+        player, without building the child boards.
+
+        Parameters
+        ----------
+        moves : list<(int, int)>
+            Legal moves of the active player
+
+        Returns
+        -------
+        list<(int, int)>
+            For each move, the bitboards of the legal moves of the player
+            making the move and of the player moving next (the inactive
+            player of this board), once the move is applied. Cell idx is
+            bit `1 << idx` with idx = row + column * height.
+        """
+        knight_masks, height = self._knight_masks, self.height
+        next_idx = self._player_idx(self._inactive_player)
+        masks = []
+        for r, c in moves:
+            idx = r + c * height
+            blank = self._blank & ~(1 << idx)
+            if next_idx == Board.NOT_MOVED:
+                next_mask = blank
+            else:
+                next_mask = knight_masks[next_idx] & blank
+            masks.append((knight_masks[idx] & blank, next_mask))
+        return masks
+
+    def _player_idx(self, player):
+        """Return the cell of the last move of a player (or NOT_MOVED) """
+        if player == self._player_1:
+            return self._p1_loc
+        elif player == self._player_2:
+            return self._p2_loc
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _moves_mask(self, idx):
+        """Return the bitboard of the legal moves from a cell (or NOT_MOVED) """
+        if idx == Board.NOT_MOVED:
+            return self._blank
+        return self._knight_masks[idx] & self._blank
+
+    def _has_moves(self, player):
+        return bool(self._moves_mask(self._player_idx(player)))
+
+    def __get_moves(self, idx):
         """Generate the list of possible moves for an L-shaped motion (like a
         knight in chess).
         """
-        if loc == Board.NOT_MOVED:
+        if idx == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
-        random.shuffle(valid_moves)
+        valid_moves = _legal_moves(self._knight_masks[idx] & self._blank, self._coords,
+                                   self._move_lists)
+        _shuffle(valid_moves)
         return valid_moves
 
     def print_board(self):
@@ -271,8 +473,8 @@ class Board(object):
         the location of each player and indicating which cells have been
         blocked, and which remain open.
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
+        p1_loc = self._p1_loc
+        p2_loc = self._p2_loc
 
         col_margin = len(str(self.height - 1)) + 1
         prefix = "{:<" + "{}".format(col_margin) + "}"
@@ -282,7 +484,7 @@ class Board(object):
             out += prefix.format(i) + ' | '
             for j in range(self.width):
                 idx = i + j * self.height
-                if not self._board_state[idx]:
+                if self._blank >> idx & 1:
                     out += ' '
                 elif p1_loc == idx:
                     out += symbols[0]
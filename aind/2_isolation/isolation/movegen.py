@@ -0,0 +1,130 @@
+"""Table-driven move generation for `isolation.Board`.
+
+The legal moves of a player are the cells of the bitboard
+`knight_masks[cell] & blank`.  A knight reaches at most 8 cells, so on a 7x7
+board there are only 3408 distinct masks of legal moves over all games;
+`legal_moves` converts each of them to a tuple of (row, column) coordinates
+once, and afterwards only copies the tuple into a new list.  `is_legal`
+finds the cell of a move with a single dictionary lookup instead of checking
+the bounds and computing the index.
+
+`Board.get_legal_moves` returns the moves in random order, and the shuffle
+takes more time than finding the moves.  `shuffle` is `random.shuffle`
+without its method calls: it draws the same numbers from the generator of
+the `random` module and makes the same swaps, so the board behaves
+identically, random choices included, with or without this module.  The
+import checks this against `random.shuffle` (whose algorithm could change
+in other versions of Python) and fails if they differ.
+
+`isolation.py` imports this module unless the environment variable
+`ISOLATION_MOVEGEN` is set to `python`, and falls back on its own code if
+the import fails.
+
+The module only uses the subset of Python that Cython compiles unchanged:
+`cythonize -i isolation/movegen.py` builds an extension module, which Python
+then imports in preference to this file.
+"""
+
+import random
+
+_getrandbits = random.getrandbits
+
+# the number of bits drawn to choose among n items
+_BITS = tuple(n.bit_length() for n in range(17))
+
+_cells = {}
+
+
+def board_cells(width, height):
+    """Return the (cached) dict mapping the (row, column) coordinates of
+    every cell of a board size to its index `row + column * height`.
+    """
+    key = (width, height)
+    if key not in _cells:
+        cells = {}
+        for idx in range(width * height):
+            cells[(idx % height, idx // height)] = idx
+        _cells[key] = cells
+    return _cells[key]
+
+
+def legal_moves(mask, coords, move_lists):
+    """Return a new list of the (row, column) coordinates of the cells set
+    in a bitboard, in increasing cell order.
+
+    Parameters
+    ----------
+    mask : int
+        The bitboard of the moves
+
+    coords : tuple
+        The coordinates of every cell
+
+    move_lists : dict
+        The moves of the masks already converted (for the board size of
+        `coords`), updated with `mask`
+    """
+    moves = move_lists.get(mask)
+    if moves is None:
+        cells = []
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            cells.append(coords[bit.bit_length() - 1])
+            rest ^= bit
+        moves = tuple(cells)
+        move_lists[mask] = moves
+    return list(moves)
+
+
+def is_legal(move, blank, width, height, cells):
+    """Return True if a (row, column) move is on the board and its cell is
+    open in the bitboard `blank`.  Moves that are not the coordinates of a
+    cell (off the board, [row, column] lists, None) are checked with the
+    bounds and the index like `isolation._is_legal`, so they give the same
+    result or raise the same error.
+    """
+    try:
+        idx = cells[move]
+    except (KeyError, TypeError):
+        idx = move[0] + move[1] * height
+        return 0 <= move[0] < height and 0 <= move[1] < width and bool(blank >> idx & 1)
+    return bool(blank >> idx & 1)
+
+
+def shuffle(moves):
+    """Shuffle a list in place exactly like `random.shuffle` """
+    i = len(moves) - 1
+    while i > 0:
+        n = i + 1
+        k = _BITS[n] if n < 17 else n.bit_length()
+        j = _getrandbits(k)
+        while j >= n:
+            j = _getrandbits(k)
+        moves[i], moves[j] = moves[j], moves[i]
+        i -= 1
+
+
+def _shuffles_like_random():
+    """Return True if `shuffle` and `random.shuffle` agree on lists of up to
+    20 items (leaving the state of the generator unchanged)
+    """
+    state = random.getstate()
+    try:
+        for n in range(21):
+            random.seed(n)
+            expected = list(range(n))
+            random.shuffle(expected)
+            after = random.random()
+            random.seed(n)
+            moves = list(range(n))
+            shuffle(moves)
+            if moves != expected or random.random() != after:
+                return False
+        return True
+    finally:
+        random.setstate(state)
+
+
+if not _shuffles_like_random():
+    raise ImportError("movegen.shuffle does not match random.shuffle")
@@ -0,0 +1,128 @@
+"""Move ordering for the alpha-beta search in game_agent.py.
+
+Alpha-beta prunes the most when the best move of every node is searched
+first.  `MoveOrderer` sorts the legal moves of a node by:
+
+    1. the principal variation (PV) move: the best move stored for the
+       position by the previous iteration of iterative deepening
+    2. the killer moves: moves that caused a cutoff at the same ply of the
+       game in another branch of the tree
+    3. the history heuristic: moves that caused cutoffs anywhere in the tree,
+       weighted by the square of the depth searched below them
+
+Moves with equal scores keep the (random) order of `Board.get_legal_moves`.
+The orderer also counts how often nodes are cut off, and how often the cutoff
+comes from the first move searched, which is the measure of ordering quality.
+"""
+
+PV_SCORE = 1 << 30
+KILLER_SCORE = 1 << 20
+
+
+class MoveOrderer(object):
+    """Order the moves of alpha-beta nodes and keep cutoff statistics.
+
+    Parameters
+    ----------
+    num_killers : int (optional)
+        The number of killer moves remembered per ply.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of nodes whose moves were ordered.
+
+    cutoffs : int
+        The number of those nodes that were cut off.
+
+    first_move_cutoffs : int
+        The number of cutoffs caused by the first move searched.
+
+    cutoffs_by : dict
+        The number of cutoffs caused by a PV move, a killer move or any
+        other move ('pv', 'killer' and 'other').
+    """
+    def __init__(self, num_killers=2):
+        self.num_killers = num_killers
+        self.killers = {}
+        self.history = {}
+        self.pv_move = None
+        self.nodes = self.cutoffs = self.first_move_cutoffs = 0
+        self.cutoffs_by = {'pv': 0, 'killer': 0, 'other': 0}
+
+    def new_search(self):
+        """Forget the killer moves and the PV move of the previous turn and
+        age the history scores.
+        """
+        self.killers = {}
+        self.pv_move = None
+        for key in self.history:
+            self.history[key] >>= 1
+
+    def order(self, game, moves, pv_move=None):
+        """Return the moves of a node sorted from the most to the least
+        promising.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The position of the node
+
+        moves : list<(int, int)>
+            The legal moves of the active player
+
+        pv_move : (int, int) (optional)
+            The best move found for the position by an earlier search
+        """
+        self.nodes += 1
+        side = game.move_count % 2
+        killers = self.killers.get(game.move_count, ())
+        history = self.history
+
+        def score(move):
+            if move == pv_move:
+                return PV_SCORE
+            if move in killers:
+                return KILLER_SCORE - killers.index(move)
+            return history.get((side, move), 0)
+
+        return sorted(moves, key=score, reverse=True)
+
+    def cutoff(self, game, move, depth, index, pv_move=None):
+        """Record that `move`, the index-th move searched at a node of `game`
+        with `depth` plies left, caused a cutoff.
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        killers = self.killers.setdefault(game.move_count, [])
+        if move == pv_move:
+            self.cutoffs_by['pv'] += 1
+        elif move in killers:
+            self.cutoffs_by['killer'] += 1
+        else:
+            self.cutoffs_by['other'] += 1
+
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.num_killers:]
+
+        key = (game.move_count % 2, move)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    @property
+    def cutoff_rate(self):
+        """The fraction of the ordered nodes that were cut off """
+        return self.cutoffs / self.nodes if self.nodes else 0.
+
+    @property
+    def first_move_rate(self):
+        """The fraction of the cutoffs caused by the first move searched """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.
+
+    def __repr__(self):
+        return ('MoveOrderer(nodes={}, cutoffs={}, cutoff_rate={:.3f}, '
+                'first_move_rate={:.3f}, cutoffs_by={})').format(
+                    self.nodes, self.cutoffs, self.cutoff_rate, self.first_move_rate,
+                    self.cutoffs_by)
@@ -0,0 +1,221 @@
+"""Build and use an opening book for isolation.
+
+The first moves of a game are the most expensive to search (a player that
+has not moved yet can move to any open cell) and they are the same in every
+game, so they can be searched once, offline, to a much greater depth than
+the time limit of a turn allows.  `build` searches every position of the
+first `plies` plies of the game and records the best move of each in an
+`OpeningBook`:
+
+    $ python opening_book.py -o opening_book.json --plies 2 --depth 5
+
+Positions that are reflections or rotations of each other (the 8 symmetries
+of a square board, 4 for other boards) are searched and stored once: each
+position is stored under the smallest key among those of its symmetric
+images, with its best move expressed in that frame.  A lookup computes the
+key of the position in the same way and maps the stored move back, so it
+costs a few list lookups whatever the size of the book.
+
+The book is saved as JSON, with one entry per canonical position mapping
+"<player 1 cell>,<player 2 cell>,<blocked cells>" to the cell of the best
+move, where a cell is its index `row + column * height` (-1 for a player
+that has not moved).
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+
+from isolation import Board
+from sample_players import improved_score
+
+
+def symmetries(width, height):
+    """Return the symmetries of a board as permutations of the cell indices
+    (the image of every cell), the identity first.
+    """
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (height - 1 - r, c),
+        lambda r, c: (r, width - 1 - c),
+        lambda r, c: (height - 1 - r, width - 1 - c),
+    ]
+    if width == height:
+        n = width - 1
+        transforms += [
+            lambda r, c: (c, r),
+            lambda r, c: (c, n - r),
+            lambda r, c: (n - c, r),
+            lambda r, c: (n - c, n - r),
+        ]
+    perms = []
+    for transform in transforms:
+        perm = []
+        for idx in range(width * height):
+            r, c = transform(idx % height, idx // height)
+            perm.append(r + c * height)
+        perms.append(tuple(perm))
+    return perms
+
+
+class OpeningBook(object):
+    """Best moves of opening positions, stored once per symmetry class.
+
+    Parameters
+    ----------
+    width, height : int (optional)
+        The size of the board the book is for.
+
+    moves : dict (optional)
+        Canonical position keys mapped to the cell of their best move (in the
+        frame of the key), as built by `add`.
+    """
+    def __init__(self, width=7, height=7, moves=None):
+        self.width = width
+        self.height = height
+        self.moves = moves if moves is not None else {}
+        self.perms = symmetries(width, height)
+        self.inverses = []
+        for perm in self.perms:
+            inverse = [0] * len(perm)
+            for idx, image in enumerate(perm):
+                inverse[image] = idx
+            self.inverses.append(inverse)
+
+    def canonical(self, game):
+        """Return the key of a position and the index of the symmetry mapping
+        the position to the frame of the key.
+        """
+        blank, active, inactive = game.bitboards()
+        if game.move_count % 2:
+            p1, p2 = inactive, active
+        else:
+            p1, p2 = active, inactive
+        blocked = [idx for idx in range(self.width * self.height) if not blank >> idx & 1]
+        best = None
+        for k, perm in enumerate(self.perms):
+            key = (-1 if p1 is None else perm[p1], -1 if p2 is None else perm[p2],
+                   sorted(perm[idx] for idx in blocked))
+            if best is None or key < best[0]:
+                best = key, k
+        (p1, p2, cells), k = best
+        return "{},{},{}".format(p1, p2, ".".join(map(str, cells))), k
+
+    def add(self, game, move):
+        """Record the best move of the active player of a position """
+        key, k = self.canonical(game)
+        self.moves[key] = self.perms[k][move[0] + move[1] * self.height]
+
+    def lookup(self, game):
+        """Return the best move of the active player from the book, or None
+        if the position is not in the book.
+        """
+        if (game.width, game.height) != (self.width, self.height):
+            return None
+        key, k = self.canonical(game)
+        if key not in self.moves:
+            return None
+        idx = self.inverses[k][self.moves[key]]
+        return (idx % self.height, idx // self.height)
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"width": self.width, "height": self.height, "moves": self.moves},
+                      f, separators=(",", ":"), sort_keys=True)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["width"], data["height"], data["moves"])
+
+    def __len__(self):
+        return len(self.moves)
+
+
+def search(game, depth):
+    """Return the best move of the active player of a game (whose players are
+    AlphaBetaPlayers) by iterative deepening to `depth` plies without a time
+    limit.
+    """
+    player = game.active_player
+    player.time_left = lambda: float("inf")
+    move = None
+    for d in range(1, depth + 1):
+        move = player.alphabeta(game, d)
+    return move
+
+
+def build(plies=2, depth=5, width=7, height=7, score_fn=improved_score, seed=0,
+          log=None):
+    """Search every opening position with fewer than `plies` moves played.
+
+    Parameters
+    ----------
+    plies : int (optional)
+        The number of plies covered by the book
+
+    depth : int (optional)
+        The depth of the search of every position
+
+    width, height : int (optional)
+        The size of the board
+
+    score_fn : callable (optional)
+        The heuristic used by the search
+
+    seed : int (optional)
+        The seed of the random tie breaking of the search
+
+    log : file (optional)
+        Where to report the progress of the build
+
+    Returns
+    -------
+    OpeningBook
+    """
+    # imported here so that game_agent can use the book without a cycle
+    from game_agent import AlphaBetaPlayer
+
+    random.seed(seed)
+    players = [AlphaBetaPlayer(score_fn=score_fn, endgame=False) for _ in range(2)]
+    book = OpeningBook(width, height)
+    positions = [Board(players[0], players[1], width, height)]
+    for ply in range(plies):
+        start = timeit.default_timer()
+        children = {}
+        for game in positions:
+            book.add(game, search(game, depth))
+            if ply + 1 < plies:
+                for move in game.get_legal_moves():
+                    child = game.forecast_move(move)
+                    children.setdefault(book.canonical(child)[0], child)
+        if log is not None:
+            print("ply {}: {} positions in {:.1f}s".format(
+                ply, len(positions), timeit.default_timer() - start), file=log)
+        positions = list(children.values())
+    return book
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-o", "--output", default="opening_book.json",
+                        help="file to write the book to")
+    parser.add_argument("--plies", type=int, default=2,
+                        help="number of plies covered by the book")
+    parser.add_argument("--depth", type=int, default=5,
+                        help="search depth for every position")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    book = build(args.plies, args.depth, args.width, args.height, seed=args.seed,
+                 log=sys.stderr)
+    book.save(args.output)
+    print("Wrote {} positions to {}".format(len(book), args.output), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
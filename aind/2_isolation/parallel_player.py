@@ -0,0 +1,256 @@
+"""Parallel root splitting for the alpha-beta agent.
+
+`ParallelAlphaBetaPlayer` splits the legal moves of the root among a pool of
+worker processes.  Each worker runs iterative deepening on its share of the
+moves until the turn is almost over and returns the best move and value of
+every depth it completed.  The player then picks the best move among the
+results of the deepest iteration completed by every worker, so values found
+at different depths are never compared.
+
+The `time_left` callable cannot be sent to other processes, so the end of the
+turn is sent as a wall-clock time instead.  Neither is the board: it refers
+to both players, and the opponent may hold a `time_left` closure or large
+tables, so the workers receive a snapshot of the board state (`board_snapshot`)
+and rebuild the board with a placeholder opponent.  Workers stop `TIMER_THRESHOLD`
+milliseconds earlier than a single-process search would, which leaves time
+to send the results back.  The player stops waiting for results when its own
+`time_left()` falls below `TIMER_THRESHOLD`, and falls back on the first legal
+move if no worker answered in time, so it always returns a legal move.
+
+Every search leaves a list of `WorkerReport` in `last_reports`:
+
+    player = ParallelAlphaBetaPlayer(workers=4)
+    ...
+    for report in player.last_reports:
+        print(report.pid, report.depth, report.nodes_per_sec)
+"""
+import os
+import time
+import uuid
+from collections import namedtuple
+from multiprocessing import Pool, TimeoutError, cpu_count
+
+from isolation import Board
+from game_agent import (AlphaBetaPlayer, SearchTimeout, PERSPECTIVE_SALT, custom_score,
+                        make_move, unmake_move)
+from endgame import EndgameSolver
+from move_ordering import MoveOrderer
+from search_stats import SearchStats
+from transposition import TranspositionTable
+
+WorkerReport = namedtuple("WorkerReport",
+                          ["pid", "moves", "depth", "nodes", "seconds", "nodes_per_sec"])
+
+# the attributes of `isolation.Board` holding the state of a game (all ints)
+_BOARD_STATE = ("move_count", "_blank", "_p1_loc", "_p2_loc", "_initiative", "_zobrist")
+
+# transposition tables and move orderers kept by a worker process for each
+# player it searches for, so they survive from one turn to the next
+_worker_state = {}
+
+
+def now_millis():
+    return 1000 * time.time()
+
+
+def board_snapshot(game):
+    """Return the state of a board as a tuple of ints, without its players """
+    return (game.width, game.height) + tuple(getattr(game, name) for name in _BOARD_STATE)
+
+
+def restore_board(snapshot, player, opponent="Opponent"):
+    """Rebuild the board of a snapshot with `player` as the active player
+    and a placeholder opponent
+    """
+    width, height = snapshot[:2]
+    state = dict(zip(_BOARD_STATE, snapshot[2:]))
+    if state["_initiative"]:
+        game = Board(opponent, player, width, height)
+    else:
+        game = Board(player, opponent, width, height)
+    for name, value in state.items():
+        setattr(game, name, value)
+    game._active_player, game._inactive_player = player, opponent
+    return game
+
+
+def _search_moves(player, snapshot, moves, end):
+    """Entry point of the worker processes (see `search_moves`) """
+    if player.token not in _worker_state:
+        _worker_state[player.token] = (player.tt, player.orderer)
+    player.tt, player.orderer = _worker_state[player.token]
+    return player.search_moves(restore_board(snapshot, player), moves, end)
+
+
+class ParallelAlphaBetaPlayer(AlphaBetaPlayer):
+    """Alpha-beta agent searching the root moves in parallel with a process
+    pool.
+
+    Parameters
+    ----------
+    workers : int (optional)
+        The number of worker processes (all CPUs by default). With a single
+        worker the player searches in its own process like AlphaBetaPlayer.
+
+    The other parameters are those of `AlphaBetaPlayer`.  A `SearchStats`
+    collector records the nodes searched by the workers and the depth
+    completed by all of them, but not the cutoffs or the iterations of the
+    workers.  The time manager is only used with a single worker: the
+    workers search until the end of the turn.  A move counts as timed out
+    when some worker did not answer before the end of the turn.
+    """
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10., in_place=False,
+                 tt_size=2**16, ordering=True, batch_eval=True, endgame=True, workers=None,
+                 stats=None, time_manager=True):
+        AlphaBetaPlayer.__init__(self, search_depth, score_fn, timeout, in_place,
+                                 tt_size, ordering, batch_eval, endgame, stats, time_manager)
+        self.workers = workers or cpu_count()
+        self.tt_size = tt_size
+        self.ordering = ordering
+        self.use_endgame = endgame
+        self.token = uuid.uuid4().hex
+        self.nodes = 0
+        self.last_reports = []
+        self._pool = None
+
+    def __getstate__(self):
+        # the pool and the time_left callable cannot be pickled, the tables
+        # are not worth sending (the workers keep their own) and the copy
+        # gets an empty statistics collector
+        state = self.__dict__.copy()
+        state.update(_pool=None, time_left=None, tt=None, orderer=None, endgame=None,
+                     last_reports=[])
+        if self.stats is not None:
+            state["stats"] = SearchStats()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.tt = TranspositionTable(self.tt_size) if self.tt_size else None
+        self.orderer = MoveOrderer() if self.ordering else None
+        self.endgame = EndgameSolver() if self.use_endgame else None
+
+    def close(self):
+        """Shut down the worker processes """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def terminal_test(self, game):
+        self.nodes += 1
+        return AlphaBetaPlayer.terminal_test(self, game)
+
+    def get_move(self, game, time_left):
+        """Search for the best move with the worker processes and return it
+        before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        if self.workers <= 1:
+            return AlphaBetaPlayer.get_move(self, game, time_left)
+
+        self.time_left = time_left
+        self.last_reports = []
+        if self.stats is not None:
+            self.stats.start_move()
+
+        def finish(move, depth=0, timed_out=False, endgame=False):
+            if self.stats is not None:
+                self.stats.nodes += sum(report.nodes for report in self.last_reports)
+                self.stats.end_move(depth, time_left(), timed_out, endgame)
+            return move
+
+        moves = game.get_legal_moves()
+        if not moves:
+            return finish((-1, -1))
+        if len(moves) == 1:
+            return finish(moves[0])
+        if self.endgame is not None:
+            move = self.endgame_move(game)
+            if move is not None:
+                return finish(move, endgame=True)
+
+        if self._pool is None:
+            self._pool = Pool(self.workers)
+        end = now_millis() + time_left()
+        snapshot = board_snapshot(game)
+        shares = [moves[i::self.workers] for i in range(min(self.workers, len(moves)))]
+        pending = [self._pool.apply_async(_search_moves, (self, snapshot, share, end))
+                   for share in shares]
+
+        results = []
+        for result in pending:
+            try:
+                results.append(result.get(max(0., time_left() - self.TIMER_THRESHOLD) / 1000))
+            except TimeoutError:
+                pass
+        self.last_reports = [report for _, report in results]
+        timed_out = len(results) < len(pending)
+
+        completed = [depths for depths, _ in results if depths]
+        if not completed:
+            return finish(moves[0], timed_out=timed_out)
+        depth = min(max(depths) for depths in completed)
+        best_move, best_value = moves[0], float("-inf")
+        for depths in completed:
+            move, value = depths[depth]
+            if value > best_value:
+                best_move, best_value = move, value
+        return finish(best_move, depth, timed_out)
+
+    def search_moves(self, game, moves, end):
+        """Run iterative deepening on a share of the root moves until `end`
+        (in wall-clock milliseconds) is `TIMER_THRESHOLD` milliseconds away
+
+        Returns
+        -------
+        (dict, WorkerReport)
+            The best (move, value) of `moves` for every depth completed, and
+            the search statistics of the worker
+        """
+        start = time.time()
+        self.nodes = 0
+        self.time_left = lambda: end - now_millis() - self.TIMER_THRESHOLD
+        self._salt = PERSPECTIVE_SALT if game.move_count % 2 else 0
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.orderer is not None:
+            self.orderer.new_search()
+        if self.in_place:
+            game = game.copy()
+        depths = {}
+        depth = 1
+        try:
+            while True:
+                best_move, best_value = moves[0], float("-inf")
+                for m in self.ordered_moves(game, depths.get(depth - 1, (None,))[0]):
+                    if m not in moves:
+                        continue
+                    v = self.min_value(make_move(game, m, self.in_place), depth-1,
+                                       best_value, float("inf"))
+                    unmake_move(game, self.in_place)
+                    if v > best_value:
+                        best_move, best_value = m, v
+                depths[depth] = (best_move, best_value)
+                depth += 1
+        except SearchTimeout:
+            pass
+        seconds = time.time() - start
+        report = WorkerReport(os.getpid(), len(moves), max(depths) if depths else 0,
+                              self.nodes, seconds, self.nodes / seconds if seconds else 0.)
+        return depths, report
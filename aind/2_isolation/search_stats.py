@@ -0,0 +1,163 @@
+"""Search statistics for the agents of game_agent.py.
+
+A player given a `SearchStats` (`AlphaBetaPlayer(stats=SearchStats())`)
+records what happened during every call of `get_move`: the depth of the
+deepest search completed, the nodes expanded (calls of `terminal_test`), the
+alpha-beta cutoffs, the time and nodes of every iteration of iterative
+deepening, whether the search was aborted by `SearchTimeout`, and the time
+left on the clock when the move was returned (how close the player came to
+its `TIMER_THRESHOLD`).  Players without one (the default) only pay for a
+comparison with None at every node.
+
+Statistics from several games (e.g., the copies of an agent playing the
+games of a tournament) are combined with `merge`:
+
+    total = SearchStats()
+    for stats in per_game_stats:
+        total.merge(stats)
+    print(total.summary())
+"""
+import timeit
+
+
+class SearchStats(object):
+    """Collector of the search statistics of a player.
+
+    Attributes
+    ----------
+    moves : int
+        The number of calls of `get_move` recorded.
+
+    nodes, cutoffs : int
+        The number of nodes expanded and of nodes cut off by alpha-beta.
+
+    timeouts : int
+        The number of moves whose search was aborted by `SearchTimeout`
+        (always the case for iterative deepening without a depth limit).
+
+    endgame_moves : int
+        The number of moves played by the endgame solver.
+
+    seconds : float
+        The total time spent in `get_move`.
+
+    wasted : float
+        The time spent in iterations of iterative deepening whose result was
+        thrown away (aborted by the timer without a usable partial result).
+
+    partial_moves : int
+        The number of moves taken from an iteration aborted by the timer.
+
+    depths : list<int>
+        The depth of the deepest search completed for every move (0 if no
+        search completed).
+
+    margins : list<float>
+        The milliseconds left on the clock when every move was returned.
+
+    iterations : dict
+        Search depth -> [count, seconds, nodes] of the iterations of
+        iterative deepening that completed at that depth.
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Forget all the statistics recorded """
+        self.moves = self.nodes = self.cutoffs = 0
+        self.timeouts = self.endgame_moves = self.partial_moves = 0
+        self.seconds = self.wasted = 0.
+        self.depths = []
+        self.margins = []
+        self.iterations = {}
+        self._move_start = self._iteration_start = None
+        self._iteration_nodes = 0
+
+    def start_move(self):
+        """Start recording a call of `get_move` """
+        self._move_start = self._iteration_start = timeit.default_timer()
+        self._iteration_nodes = self.nodes
+
+    def iteration(self, depth):
+        """Record the completion of an iteration of iterative deepening """
+        now = timeit.default_timer()
+        entry = self.iterations.setdefault(depth, [0, 0., 0])
+        entry[0] += 1
+        entry[1] += now - self._iteration_start
+        entry[2] += self.nodes - self._iteration_nodes
+        self._iteration_start = now
+        self._iteration_nodes = self.nodes
+
+    def end_move(self, depth, margin, timed_out=False, endgame=False, partial=False):
+        """Record the end of a call of `get_move`
+
+        Parameters
+        ----------
+        depth : int
+            The depth of the deepest search completed
+
+        margin : float
+            The milliseconds left when the move is returned
+
+        timed_out : bool (optional)
+            Whether the search was aborted by `SearchTimeout`
+
+        endgame : bool (optional)
+            Whether the move was found by the endgame solver
+
+        partial : bool (optional)
+            Whether the move was taken from the iteration aborted by the
+            timer, whose time is then not wasted
+        """
+        now = timeit.default_timer()
+        self.moves += 1
+        self.seconds += now - self._move_start
+        if timed_out and not partial:
+            self.wasted += now - self._iteration_start
+        self.partial_moves += partial
+        self.depths.append(depth)
+        self.margins.append(margin)
+        self.timeouts += timed_out
+        self.endgame_moves += endgame
+
+    def merge(self, other):
+        """Add the statistics of another collector to these """
+        self.moves += other.moves
+        self.nodes += other.nodes
+        self.cutoffs += other.cutoffs
+        self.timeouts += other.timeouts
+        self.endgame_moves += other.endgame_moves
+        self.seconds += other.seconds
+        self.wasted += other.wasted
+        self.partial_moves += other.partial_moves
+        self.depths.extend(other.depths)
+        self.margins.extend(other.margins)
+        for depth, (count, seconds, nodes) in other.iterations.items():
+            entry = self.iterations.setdefault(depth, [0, 0., 0])
+            entry[0] += count
+            entry[1] += seconds
+            entry[2] += nodes
+        return self
+
+    def summary(self):
+        """Return the main statistics as a dict: the number of moves, the
+        mean, median and maximum depth, the nodes per move and per second, the
+        fraction of nodes cut off, the fraction of searches aborted by a
+        timeout, the smallest and mean time left and the time used and
+        wasted per move (in milliseconds).
+        """
+        moves = max(self.moves, 1)
+        return {
+            "moves": self.moves,
+            "mean_depth": sum(self.depths) / moves,
+            "median_depth": sorted(self.depths)[len(self.depths) // 2] if self.depths else 0,
+            "max_depth": max(self.depths) if self.depths else 0,
+            "nodes_per_move": self.nodes / moves,
+            "nodes_per_sec": self.nodes / self.seconds if self.seconds else 0.,
+            "cutoff_rate": self.cutoffs / self.nodes if self.nodes else 0.,
+            "timeout_rate": self.timeouts / moves,
+            "min_margin": min(self.margins) if self.margins else 0.,
+            "mean_margin": sum(self.margins) / moves,
+            "millis_per_move": 1000 * self.seconds / moves,
+            "wasted_per_move": 1000 * self.wasted / moves,
+        }
@@ -3,10 +3,27 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import gc
+import os
+import pickle
+import random
+import tempfile
+import timeit
 import unittest
 
 import isolation
 import game_agent
+import batch_scores
+import competition_agent
+import endgame
+import opening_book
+import sample_players
+import move_ordering
+from isolation import movegen
+import parallel_player
+import search_stats
+import time_manager
+import transposition
 
 from importlib import reload
 
@@ -25,5 +42,585 @@ class IsolationTest(unittest.TestCase):
         self.fail("Hello, World!")
 
 
+class BoardTest(unittest.TestCase):
+    """Unit tests for the bitboard representation of isolation.Board"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+
+    def knight_moves(self, game, loc):
+        """The legal moves from loc, computed from the public Board API"""
+        if loc is None:
+            return game.get_blank_spaces()
+        r, c = loc
+        return [(r + dr, c + dc) for dr, dc in isolation.isolation.DIRECTIONS
+                if game.move_is_legal((r + dr, c + dc))]
+
+    def test_blank_spaces(self):
+        game = isolation.Board(self.player1, self.player2, 5, 4)
+        self.assertEqual(game.get_blank_spaces(),
+                         [(r, c) for c in range(5) for r in range(4)])
+        game.apply_move((1, 2))
+        game.apply_move((3, 0))
+        self.assertEqual(len(game.get_blank_spaces()), 18)
+        self.assertFalse(game.move_is_legal((1, 2)))
+        self.assertFalse(game.move_is_legal((4, 0)))
+        self.assertEqual(game.get_player_location(self.player1), (1, 2))
+        self.assertEqual(game.get_player_location(self.player2), (3, 0))
+
+    def test_random_games(self):
+        rng = random.Random(0)
+        for width, height in [(7, 7), (5, 8), (9, 3)]:
+            for _ in range(10):
+                game = isolation.Board(self.player1, self.player2, width, height)
+                while True:
+                    player = game.active_player
+                    loc = game.get_player_location(player)
+                    moves = game.get_legal_moves()
+                    self.assertEqual(sorted(moves), sorted(self.knight_moves(game, loc)))
+                    if not moves:
+                        self.assertTrue(game.is_loser(player))
+                        self.assertEqual(game.utility(player), float("-inf"))
+                        self.assertEqual(game.utility(game.inactive_player), float("inf"))
+                        break
+                    self.assertEqual(game.utility(player), 0.)
+                    before = game.copy()
+                    game = game.forecast_move(rng.choice(moves))
+                    # forecasting leaves the original board untouched
+                    self.assertEqual(sorted(before.get_legal_moves()), sorted(moves))
+
+    def test_push_pop(self):
+        rng = random.Random(1)
+        game = isolation.Board(self.player1, self.player2)
+        snapshots = []
+        while game.get_legal_moves():
+            snapshots.append((game.to_string(), game.active_player, game.move_count, game.hash()))
+            move = rng.choice(game.get_legal_moves())
+            game.push(move)
+            self.assertEqual(game.get_player_location(game.inactive_player), move)
+        while snapshots:
+            game.pop()
+            self.assertEqual((game.to_string(), game.active_player, game.move_count, game.hash()),
+                             snapshots.pop())
+
+    def test_hash(self):
+        game = isolation.Board(self.player1, self.player2)
+        a = game.forecast_move((0, 0)).forecast_move((2, 3)).forecast_move((1, 2))
+        b = game.forecast_move((1, 2)).forecast_move((2, 3)).forecast_move((0, 0))
+        self.assertNotEqual(a.hash(), b.hash())
+        c = game.forecast_move((0, 0)).forecast_move((2, 3)).forecast_move((1, 2))
+        self.assertEqual(a.hash(), c.hash())
+
+    def test_hash_transposition(self):
+        # player 1 reaches (2, 1) through the same cells in a different order
+        p2_path = [(6, 6), (4, 5), (6, 4), (4, 3)]
+        hashes = []
+        for p1_path in ([(0, 0), (1, 2), (3, 3), (2, 1)],
+                        [(3, 3), (1, 2), (0, 0), (2, 1)]):
+            game = isolation.Board(self.player1, self.player2)
+            for p1_move, p2_move in zip(p1_path, p2_path):
+                game.apply_move(p1_move)
+                game.apply_move(p2_move)
+            hashes.append(game.hash())
+        self.assertEqual(hashes[0], hashes[1])
+
+    def test_to_string(self):
+        game = isolation.Board(self.player1, self.player2, 3, 3)
+        game.apply_move((0, 0))
+        game.apply_move((2, 2))
+        game.apply_move((1, 2))
+        lines = game.to_string().split('\n\r')
+        self.assertEqual(lines[1], "0  | - |   |   | ")
+        self.assertEqual(lines[2], "1  |   |   | 1 | ")
+        self.assertEqual(lines[3], "2  |   |   | 2 | ")
+
+
+class MoveGenTest(unittest.TestCase):
+    """The table-driven move generation matches the bitboard code"""
+
+    def test_legal_moves(self):
+        rng = random.Random(0)
+        for width, height in ((7, 7), (5, 4)):
+            knight_masks, coords = isolation.board_tables(width, height)
+            move_lists = {}
+            for _ in range(500):
+                idx = rng.randrange(width * height)
+                mask = knight_masks[idx] & rng.getrandbits(width * height)
+                expected = isolation.isolation.mask_to_moves(mask, coords)
+                moves = movegen.legal_moves(mask, coords, move_lists)
+                self.assertEqual(moves, expected)
+                moves.reverse()
+                self.assertEqual(movegen.legal_moves(mask, coords, move_lists), expected)
+
+    def test_shuffle(self):
+        for n in range(12):
+            random.seed(n)
+            expected = list(range(n))
+            random.shuffle(expected)
+            after = random.random()
+            random.seed(n)
+            moves = list(range(n))
+            movegen.shuffle(moves)
+            self.assertEqual(moves, expected)
+            self.assertEqual(random.random(), after)
+
+    def test_is_legal(self):
+        width, height = 5, 4
+        cells = movegen.board_cells(width, height)
+        blank = random.Random(1).getrandbits(width * height)
+        for r in range(-2, height + 2):
+            for c in range(-2, width + 2):
+                expected = (0 <= r < height and 0 <= c < width and
+                            bool(blank >> (r + c * height) & 1))
+                self.assertEqual(movegen.is_legal((r, c), blank, width, height, cells), expected)
+                self.assertEqual(movegen.is_legal([r, c], blank, width, height, cells), expected)
+        # like the bounds check of isolation.py
+        with self.assertRaises(TypeError):
+            movegen.is_legal(None, blank, width, height, cells)
+        with self.assertRaises(TypeError):
+            isolation.isolation._is_legal(None, blank, width, height, cells)
+
+
+class InPlaceSearchTest(unittest.TestCase):
+    """The players search the same tree with push/pop as with forecast_move"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def check_same_moves(self, player_class, search):
+        rng = random.Random(2)
+        for _ in range(5):
+            opening = []
+            game = isolation.Board("Player1", "Player2")
+            for _ in range(2 * rng.randint(1, 4)):
+                opening.append(rng.choice(game.get_legal_moves()))
+                game.apply_move(opening[-1])
+            moves = []
+            for player in (player_class(), player_class(in_place=True)):
+                game = isolation.Board(player, "Player2")
+                for move in opening:
+                    game.apply_move(move)
+                before = game.to_string()
+                player.time_left = lambda: 1000.
+                random.seed(3)
+                moves.append(getattr(player, search)(game, 3))
+                self.assertEqual(game.to_string(), before)
+            self.assertEqual(moves[0], moves[1])
+
+    def test_minimax(self):
+        self.check_same_moves(game_agent.MinimaxPlayer, 'minimax')
+
+    def test_alphabeta(self):
+        self.check_same_moves(game_agent.AlphaBetaPlayer, 'alphabeta')
+
+
+class TranspositionTest(unittest.TestCase):
+    """The transposition table does not change the values found by search"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_table(self):
+        tt = transposition.TranspositionTable(size=4)
+        tt.store(1, 3, transposition.EXACT, 2., (0, 1))
+        self.assertEqual(tt.lookup(1)[1:5], (3, transposition.EXACT, 2., (0, 1)))
+        self.assertIsNone(tt.lookup(5))
+        # a shallower entry of the same search does not replace a deeper one
+        tt.store(5, 2, transposition.LOWER, 1., (1, 1))
+        self.assertIsNone(tt.lookup(5))
+        tt.new_search()
+        tt.store(5, 2, transposition.LOWER, 1., (1, 1))
+        self.assertIsNone(tt.lookup(1))
+        self.assertEqual(tt.lookup(5)[3], 1.)
+        self.assertEqual(tt.replacements, 1)
+
+    def test_move_orderer(self):
+        orderer = move_ordering.MoveOrderer()
+        game = isolation.Board("Player1", "Player2")
+        moves = [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)]
+        orderer.cutoff(game.forecast_move((6, 6)).forecast_move((5, 5)), (4, 4), 3, 2)
+        orderer.cutoff(game, (3, 3), 2, 0)
+        orderer.cutoff(game, (2, 2), 1, 1)
+        self.assertEqual(orderer.order(game, moves, pv_move=(1, 1)),
+                         [(1, 1), (2, 2), (3, 3), (4, 4), (0, 0)])
+        self.assertEqual((orderer.nodes, orderer.cutoffs, orderer.first_move_cutoffs), (1, 3, 1))
+        orderer.new_search()
+        self.assertEqual(orderer.order(game, moves), [(4, 4), (3, 3), (0, 0), (1, 1), (2, 2)])
+
+    def test_same_values(self):
+        rng = random.Random(4)
+        for _ in range(5):
+            opening = []
+            game = isolation.Board("Player1", "Player2")
+            for _ in range(rng.randint(2, 8)):
+                opening.append(rng.choice(game.get_legal_moves()))
+                game.apply_move(opening[-1])
+            values = []
+            for tt_size, ordering, batch_eval in ((None, False, False), (2**10, False, False),
+                                                  (2**10, True, True)):
+                player = game_agent.AlphaBetaPlayer(tt_size=tt_size, ordering=ordering,
+                                                    batch_eval=batch_eval)
+                player.time_left = lambda: 1000.
+                players = [player, "Opponent"][::1 - 2 * (len(opening) % 2)]
+                game = isolation.Board(*players)
+                for move in opening:
+                    game.apply_move(move)
+                for depth in range(1, 5):
+                    player.alphabeta(game, depth)
+                values.append(player.max_value(game, 4, float("-inf"), float("inf")))
+            self.assertEqual(values[0], values[1])
+            self.assertEqual(values[0], values[2])
+
+
+class BatchScoresTest(unittest.TestCase):
+    """Batched scores equal the values of the children scored one by one"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_score_children(self):
+        score_fns = [sample_players.open_move_score, sample_players.improved_score,
+                     sample_players.center_score, game_agent.custom_score,
+                     game_agent.custom_score_2, game_agent.custom_score_3]
+        rng = random.Random(6)
+        checked = 0
+        for _ in range(40):
+            game = isolation.Board("Player1", "Player2", 5, 5)
+            for _ in range(rng.randint(1, 16)):
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                game.apply_move(rng.choice(moves))
+            moves = game.get_legal_moves()
+            for player in ("Player1", "Player2"):
+                for score_fn in score_fns:
+                    if (score_fn is sample_players.center_score and
+                            game.get_player_location(player) is None and
+                            player != game.active_player):
+                        continue
+                    expected = []
+                    for m in moves:
+                        child = game.forecast_move(m)
+                        if not child.get_legal_moves():
+                            expected.append(float("inf") if player == game.active_player
+                                            else float("-inf"))
+                        else:
+                            expected.append(score_fn(child, player))
+                    self.assertEqual(
+                        batch_scores.score_children(game, player, moves, score_fn), expected)
+                    checked += len(moves)
+        self.assertGreater(checked, 1000)
+
+    def test_unknown_score(self):
+        game = isolation.Board("Player1", "Player2")
+        self.assertIsNone(batch_scores.score_children(
+            game, "Player1", game.get_legal_moves(), lambda game, player: 0.))
+
+
+class EndgameTest(unittest.TestCase):
+    """The endgame solver finds the longest paths of partitioned games"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def partitioned_games(self, count, seed):
+        rng = random.Random(seed)
+        games = []
+        while len(games) < count:
+            game = isolation.Board("Player1", "Player2", 5, 5)
+            while game.get_legal_moves():
+                if endgame.is_partitioned(game):
+                    games.append(game)
+                    break
+                game.apply_move(rng.choice(game.get_legal_moves()))
+        return games
+
+    def longest_path(self, game, player):
+        """Brute force longest path of a player who keeps moving alone"""
+        moves = game.get_legal_moves(player)
+        best = 0
+        for move in moves:
+            child = game.copy()
+            child._active_player = player
+            child.apply_move(move)
+            best = max(best, 1 + self.longest_path(child, player))
+        return best
+
+    def test_longest_path(self):
+        solver = endgame.EndgameSolver()
+        for game in self.partitioned_games(20, seed=7):
+            move, active, inactive = solver.solve(game)
+            self.assertEqual(active, self.longest_path(game, game.active_player))
+            self.assertEqual(inactive, self.longest_path(game, game.inactive_player))
+            if active:
+                self.assertIn(move, game.get_legal_moves())
+                self.assertEqual(active, 1 + self.longest_path(game.forecast_move(move),
+                                                               game.active_player))
+
+    def test_perfect_play(self):
+        solver = endgame.EndgameSolver()
+        for game in self.partitioned_games(10, seed=8):
+            move, active, inactive = solver.solve(game)
+            expected_winner = game.active_player if active > inactive else game.inactive_player
+            while game.get_legal_moves():
+                game.apply_move(solver.solve(game)[0])
+            self.assertEqual(game.inactive_player, expected_winner)
+
+    def test_not_partitioned(self):
+        game = isolation.Board("Player1", "Player2")
+        self.assertIsNone(endgame.EndgameSolver().solve(game))
+        game.apply_move((3, 3))
+        game.apply_move((3, 4))
+        self.assertFalse(endgame.is_partitioned(game))
+
+    def test_players(self):
+        for player in (game_agent.AlphaBetaPlayer(), competition_agent.CustomPlayer(timeout=10.)):
+            opponent = sample_players.RandomPlayer()
+            game = isolation.Board(player, opponent)
+            winner, history, termination = game.play(time_limit=100)
+            self.assertNotIn(termination, ("timeout", "forfeit"))
+
+
+class OpeningBookTest(unittest.TestCase):
+    """The opening book stores one move per symmetry class of positions"""
+
+    def setUp(self):
+        reload(game_agent)
+        self.book = opening_book.build(plies=3, depth=2, width=5, height=5)
+
+    def test_symmetries(self):
+        self.assertEqual(len(opening_book.symmetries(7, 7)), 8)
+        self.assertEqual(len(opening_book.symmetries(7, 5)), 4)
+        for perm in opening_book.symmetries(5, 5):
+            self.assertEqual(sorted(perm), list(range(25)))
+
+    def test_lookup(self):
+        # 6 first moves are distinct up to symmetry on a 5x5 board
+        self.assertEqual(len([k for k in self.book.moves if k.split(",")[:2] != ["-1", "-1"] and
+                              k.split(",")[1] == "-1"]), 6)
+        perms = opening_book.symmetries(5, 5)
+        rng = random.Random(9)
+        for _ in range(30):
+            moves = []
+            game = isolation.Board("Player1", "Player2", 5, 5)
+            for _ in range(rng.randint(0, 2)):
+                moves.append(rng.choice(game.get_legal_moves()))
+                game.apply_move(moves[-1])
+            best = self.book.lookup(game)
+            self.assertIn(best, game.get_legal_moves())
+            # the images of the position get the image of the move (up to the
+            # symmetries of the position itself)
+            after = self.book.canonical(game.forecast_move(best))[0]
+            for perm in perms:
+                image = isolation.Board("Player1", "Player2", 5, 5)
+                for r, c in moves:
+                    idx = perm[r + c * 5]
+                    image.apply_move((idx % 5, idx // 5))
+                image.apply_move(self.book.lookup(image))
+                self.assertEqual(self.book.canonical(image)[0], after)
+        game.apply_move(best)
+        game.apply_move(game.get_legal_moves()[0])
+        self.assertIsNone(self.book.lookup(game))
+
+    def test_save_load(self):
+        path = os.path.join(tempfile.mkdtemp(), "book.json")
+        self.book.save(path)
+        book = opening_book.OpeningBook.load(path)
+        self.assertEqual(book.moves, self.book.moves)
+        player = competition_agent.CustomPlayer(data=path)
+        game = isolation.Board(player, "Opponent", 5, 5)
+        self.assertEqual(player.get_move(game, lambda: 1000.), book.lookup(game))
+
+
+class SearchStatsTest(unittest.TestCase):
+    """The players record their searches in a SearchStats collector"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def play(self, player):
+        game = isolation.Board(player, sample_players.GreedyPlayer(), 5, 5)
+        game.apply_move((2, 2))
+        game.apply_move((0, 0))
+        for _ in range(4):
+            start = timeit.default_timer()
+            player.get_move(game.copy(), lambda: 100 - 1000 * (timeit.default_timer() - start))
+        return player.stats
+
+    def test_minimax(self):
+        stats = self.play(game_agent.MinimaxPlayer(stats=search_stats.SearchStats()))
+        self.assertEqual(stats.moves, 4)
+        self.assertEqual(stats.depths, [3] * 4)
+        self.assertGreater(stats.nodes, 0)
+        self.assertEqual(stats.cutoffs, 0)
+        self.assertEqual(stats.timeouts, 0)
+
+    def test_alphabeta(self):
+        stats = self.play(game_agent.AlphaBetaPlayer(endgame=False, time_manager=False,
+                                                     stats=search_stats.SearchStats()))
+        self.assertEqual(stats.moves, 4)
+        self.assertEqual(stats.timeouts, 4)
+        self.assertTrue(all(depth > 0 for depth in stats.depths))
+        self.assertTrue(all(margin >= 0 for margin in stats.margins))
+        self.assertGreater(stats.cutoffs, 0)
+        self.assertEqual(stats.iterations[1][0], 4)
+        self.assertLessEqual(sum(nodes for _, _, nodes in stats.iterations.values()),
+                             stats.nodes)
+
+        total = search_stats.SearchStats().merge(stats).merge(stats)
+        self.assertEqual(total.nodes, 2 * stats.nodes)
+        self.assertEqual(total.iterations[1][0], 8)
+        summary = total.summary()
+        self.assertEqual(summary["moves"], 8)
+        self.assertEqual(summary["timeout_rate"], 1.)
+
+    def test_disabled(self):
+        player = game_agent.AlphaBetaPlayer()
+        self.assertIsNone(player.stats)
+        self.assertIsNone(self.play(player))
+
+
+class TimeManagerTest(unittest.TestCase):
+    """The time manager stops iterative deepening early"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_predict(self):
+        manager = time_manager.TimeManager(ebf=4., safety=1., min_millis=5., decay=0.5)
+        manager.start(150.)
+        manager.completed(149.)
+        self.assertEqual(manager.predict(), 4.)
+        manager.completed(139.)
+        self.assertEqual(manager.ebf, 4.)
+        manager.completed(109.)
+        self.assertEqual(manager.ebf, 3.5)
+        self.assertEqual(manager.predict(), 105.)
+        self.assertFalse(manager.next_fits(109., 10.))
+        self.assertTrue(manager.next_fits(120., 10.))
+        self.assertEqual(manager.stops, 1)
+
+    def test_proven(self):
+        # a clock that never runs out: only a proven root stops the search
+        random.seed(4)
+        player = game_agent.AlphaBetaPlayer(endgame=False)
+        game = isolation.Board(player, sample_players.RandomPlayer(), 5, 5)
+        while len(game.get_blank_spaces()) > 12 and game.get_legal_moves():
+            game.apply_move(random.choice(game.get_legal_moves()))
+        if game.active_player is not player:
+            game.apply_move(random.choice(game.get_legal_moves()))
+        self.assertIn(player.get_move(game, lambda: 1000.), game.get_legal_moves())
+        self.assertIn(player.root_value, (float("inf"), float("-inf")))
+
+    def test_partial(self):
+        # a clock ticking once per call aborts an iteration half way
+        random.seed(5)
+        player = game_agent.AlphaBetaPlayer(endgame=False, stats=search_stats.SearchStats())
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        ticks = iter(range(5000, 0, -1))
+        move = player.get_move(game, lambda: next(ticks))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player.stats.timeouts, 1)
+        self.assertEqual(player.stats.partial_moves, 1)
+        self.assertEqual(move, player.root_move)
+
+
+    def test_pause_gc(self):
+        seen = []
+
+        def score(game, player):
+            seen.append(gc.isenabled())
+            return 0.
+
+        for pause in (False, True):
+            del seen[:]
+            player = game_agent.AlphaBetaPlayer(
+                score_fn=score, tt_size=None, batch_eval=False, endgame=False,
+                time_manager=time_manager.TimeManager(pause_gc=pause))
+            game = isolation.Board(player, "Opponent")
+            game.apply_move((3, 3))
+            game.apply_move((2, 2))
+            ticks = iter(range(1000, 0, -1))
+            player.get_move(game, lambda: next(ticks))
+            self.assertTrue(seen)
+            self.assertEqual(set(seen), {not pause})
+            self.assertTrue(gc.isenabled())
+
+    def test_no_legal_moves(self):
+        # the center of a 3x3 board has no knight moves
+        player = game_agent.AlphaBetaPlayer(stats=search_stats.SearchStats())
+        game = isolation.Board(player, "Opponent", 3, 3)
+        game.apply_move((1, 1))
+        game.apply_move((0, 0))
+        ticks = iter(range(1000, 0, -1))
+        self.assertEqual(player.get_move(game, lambda: next(ticks)), (-1, -1))
+        self.assertGreater(next(ticks), 990)
+        self.assertEqual(player.stats.depths, [0])
+        self.assertEqual(player.stats.timeouts, 0)
+
+
+class ParallelPlayerTest(unittest.TestCase):
+    """The parallel player returns legal moves in time"""
+
+    def setUp(self):
+        reload(game_agent)
+        reload(parallel_player)
+        self.player = parallel_player.ParallelAlphaBetaPlayer(workers=2)
+
+    def tearDown(self):
+        self.player.close()
+
+    def test_get_move(self):
+        game = isolation.Board(self.player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        for time_limit in (150, 30, 1):
+            start = timeit.default_timer()
+            time_left = lambda: time_limit - 1000 * (timeit.default_timer() - start)
+            move = self.player.get_move(game.copy(), time_left)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertGreaterEqual(time_left(), 0)
+        self.player.get_move(game.copy(), lambda: 1000.)
+        self.assertEqual(sum(r.moves for r in self.player.last_reports), 8)
+        self.assertTrue(all(r.depth > 0 and r.nodes_per_sec > 0 for r in self.player.last_reports))
+
+    def test_play_alphabeta(self):
+        # the board refers to an opponent holding a time_left closure and a
+        # transposition table; the workers must only receive its state
+        stats = search_stats.SearchStats()
+        self.player.stats = stats
+        opponent = game_agent.AlphaBetaPlayer()
+        game = isolation.Board(self.player, opponent)
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        winner, history, outcome = game.play(time_limit=150)
+        self.assertIn(winner, (self.player, opponent))
+        self.assertNotEqual(outcome, "timeout")
+        self.assertGreater(stats.moves, 0)
+        self.assertEqual(stats.timeouts, 0)
+
+    def test_snapshot(self):
+        opponent = game_agent.AlphaBetaPlayer()
+        game = isolation.Board(opponent, self.player)
+        for move in ((3, 3), (2, 2), (1, 4)):
+            game.apply_move(move)
+        board = parallel_player.restore_board(parallel_player.board_snapshot(game), self.player)
+        self.assertIs(board.active_player, self.player)
+        self.assertEqual(board.hash(), game.hash())
+        self.assertEqual(board.to_string(), game.to_string())
+        self.assertEqual(sorted(board.get_legal_moves()), sorted(game.get_legal_moves()))
+
+    def test_pickle(self):
+        game = isolation.Board(self.player, "Opponent")
+        self.player.get_move(game.forecast_move((3, 3)), lambda: 1000.)
+        clone = pickle.loads(pickle.dumps(self.player))
+        self.assertIsNone(clone._pool)
+        self.assertIsNone(clone.time_left)
+        self.assertEqual(clone.token, self.player.token)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,68 @@
+"""Unit tests for the parallel tournament runner"""
+
+import math
+import unittest
+
+import tournament
+from game_agent import AlphaBetaPlayer
+from sample_players import RandomPlayer, GreedyPlayer, improved_score
+from search_stats import SearchStats
+
+
+class TournamentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cpu_agents = [tournament.Agent(RandomPlayer(), "Random")]
+        self.test_agents = [tournament.Agent(GreedyPlayer(), "Greedy"),
+                            tournament.Agent(RandomPlayer(), "Random")]
+
+    def test_schedule(self):
+        games = tournament.schedule(2, 3, 4, seed=1)
+        self.assertEqual(len(games), 2 * 3 * 4 * 2)
+        self.assertEqual(games, tournament.schedule(2, 3, 4, seed=1))
+        self.assertNotEqual(games, tournament.schedule(2, 3, 4, seed=2))
+        # both agents of a match play both sides of the same opening
+        match = games[:6]
+        self.assertEqual(len(set(g.opening for g in match)), 1)
+        self.assertEqual([g.test_first for g in match], [False, True] * 3)
+
+    def test_reproducible(self):
+        games = tournament.schedule(1, 2, 2, seed=3)
+        agents = (self.cpu_agents, self.test_agents)
+        serial = list(tournament.play_games(games, *agents))
+        parallel = list(tournament.play_games(games, *agents, workers=2))
+        self.assertEqual([(r.test_won, r.moves) for r in serial],
+                         [(r.test_won, r.moves) for r in parallel])
+
+    def test_stats(self):
+        player = AlphaBetaPlayer(score_fn=improved_score, stats=SearchStats())
+        agents = ([tournament.Agent(RandomPlayer(), "Random")],
+                  [tournament.Agent(player, "AB_Improved")])
+        game = tournament.schedule(1, 1, 1, seed=5)[0]
+        result = tournament.play_game(game, agents=agents)
+        self.assertIsNone(result.cpu_stats)
+        self.assertGreater(result.test_stats.moves, 0)
+        self.assertLessEqual(result.test_stats.moves, (result.moves + 1) // 2)
+        # the agent of the tournament is copied, not used
+        self.assertEqual(player.stats.moves, 0)
+
+    def test_elo(self):
+        self.assertEqual(tournament.elo(0.5), 0)
+        rating, low, high = tournament.elo_interval(30, 40)
+        self.assertAlmostEqual(rating, 190.8, places=1)
+        self.assertLess(low, rating)
+        self.assertLess(rating, high)
+        # sweeps: finite ratings inside intervals of finite, nonzero width
+        for wins in (0, 10):
+            rating, low, high = tournament.elo_interval(wins, 10)
+            self.assertTrue(all(math.isfinite(r) for r in (rating, low, high)))
+            self.assertLess(low, rating)
+            self.assertLess(rating, high)
+        self.assertLess(tournament.elo_interval(0, 10)[0], tournament.elo_interval(1, 10)[0])
+        self.assertGreater(tournament.elo_interval(10, 10)[0], tournament.elo_interval(9, 10)[0])
+        self.assertEqual(tournament.format_elo(-0.3), "+0")
+        self.assertEqual(tournament.format_elo(tournament.elo_interval(5, 10)[0]), "+0")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Time management for the iterative deepening of AlphaBetaPlayer.
+
+Iterative deepening without time management starts a new iteration whenever
+the previous one completes, and throws the iteration in progress away when
+the timer expires.  An iteration usually costs a few times the previous one
+(the effective branching factor of the search), so the last iteration of a
+turn rarely completes and most of the time it takes is wasted.
+
+`TimeManager` predicts the cost of the next iteration from the cost of the
+last one and from the effective branching factor: a moving average of the
+ratio of the costs of consecutive iterations, over this turn and the earlier
+ones.  The player stops deepening when the prediction does not fit in the
+time left.  The cost of an iteration varies widely (the transposition table
+kept from the previous turn makes the first iterations almost free, and the
+first new depth comparatively expensive), so by default an iteration still
+starts when half of its predicted cost fits.  The player also stops when the
+search has proven the game won or lost (deeper searches cannot change a
+proven value), and, when the timer does abort an iteration, plays the best
+root move of that iteration if the search of the first root move (the best
+move of the previous iteration) has completed: any other move it found is
+proven better at the deeper depth.
+
+The costs are measured with the `time_left` callable of the turn, so the
+manager follows the game clock (including fake clocks in tests).
+
+A collection of the oldest generation of Python's garbage collector can take
+longer than the `TIMER_THRESHOLD` of the player (tens of milliseconds once
+the transposition table is full).  `TimeManager(pause_gc=True)` makes the
+player disable the collector while it searches and enable it again before
+returning its move.  The search itself creates no reference cycles, so
+reference counting still frees its garbage immediately, but the collector is
+process-wide state, so the pause is opt-in: it also stops collections for
+everything else running in the process (other agents, a tournament).
+"""
+
+
+class TimeManager(object):
+    """Predictor of the cost of the iterations of iterative deepening.
+
+    Parameters
+    ----------
+    ebf : float (optional)
+        The effective branching factor assumed until one has been measured.
+
+    safety : float (optional)
+        The fraction of the predicted cost of the next iteration that must
+        fit in the time left for the iteration to start.
+
+    min_millis : float (optional)
+        Iterations faster than this (mostly answered by the transposition
+        table) are not used to measure the branching factor.
+
+    decay : float (optional)
+        The weight of the estimate of earlier turns in the moving average of
+        the branching factor (updated at the end of every iteration).
+
+    pause_gc : bool (optional)
+        Disable the (process-wide) garbage collector during the search of
+        every turn.
+
+    Attributes
+    ----------
+    ebf : float
+        The current estimate of the effective branching factor.
+
+    stops : int
+        The number of turns that stopped deepening early.
+    """
+    def __init__(self, ebf=4., safety=.5, min_millis=5., decay=0.75, pause_gc=False):
+        self.ebf = ebf
+        self.safety = safety
+        self.min_millis = min_millis
+        self.decay = decay
+        self.pause_gc = pause_gc
+        self.stops = 0
+        self.costs = []
+        self._last = None
+
+    def start(self, time_left):
+        """Start timing the iterations of a turn, `time_left` milliseconds
+        before the end of the turn
+        """
+        self.costs = []
+        self._last = time_left
+
+    def completed(self, time_left):
+        """Record the completion of an iteration `time_left` milliseconds
+        before the end of the turn
+        """
+        self.costs.append(self._last - time_left)
+        self._last = time_left
+        if len(self.costs) > 1 and min(self.costs[-2:]) >= self.min_millis:
+            self.ebf = (self.decay * self.ebf +
+                        (1 - self.decay) * self.costs[-1] / self.costs[-2])
+
+    def predict(self):
+        """Return the predicted cost (in milliseconds) of the next iteration """
+        if not self.costs:
+            return 0.
+        return self.costs[-1] * self.ebf
+
+    def next_fits(self, time_left, threshold):
+        """Return True if the next iteration is predicted to complete before
+        the time left falls below `threshold` milliseconds
+        """
+        fits = self.safety * self.predict() <= time_left - threshold
+        if not fits:
+            self.stops += 1
+        return fits
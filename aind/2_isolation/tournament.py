@@ -10,18 +10,37 @@ The matches are fair because the board is initialized randomly for both
 players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
+
+The games are played in parallel by a pool of worker processes, each game
+with fresh copies of its agents.  The openings and the random choices of the
+agents are derived from a seed, which is printed and can be passed back with
+`--seed` to replay a tournament (move timing still varies from run to run):
+
+    $ python tournament.py --workers 8 --seed 1234
+
+With `--stats`, the search agents record their search statistics (see
+`search_stats.py`) and the script prints a report of every agent: the median
+and maximum depth reached, the nodes searched per move and per second, the
+fraction of nodes cut off, the fraction of searches stopped by the timer and
+the smallest time left when a move was returned.
 """
+import argparse
+import copy
 import itertools
+import math
 import random
+import timeit
 import warnings
 
 from collections import namedtuple
+from multiprocessing import Pool, cpu_count
 
 from isolation import Board
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
                         custom_score_2, custom_score_3)
+from search_stats import SearchStats
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
@@ -36,39 +55,150 @@ game_agent.py.
 
 Agent = namedtuple("Agent", ["player", "name"])
 
+# A game to play: the indices of the cpu agent and of the test agent, whether
+# the test agent moves first, the two opening moves and the seed of the game
+Game = namedtuple("Game", ["cpu", "test", "test_first", "opening", "seed"])
+
+# the search statistics of the cpu and test agents are None for agents
+# without a `stats` collector
+GameResult = namedtuple("GameResult", ["game", "test_won", "termination", "moves", "seconds",
+                                       "cpu_stats", "test_stats"])
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
-    """Compare the test agents to the cpu agent in "fair" matches.
+
+def choose_opening(rng):
+    """Choose a random move and response to initialize a game with """
+    game = Board("Player1", "Player2")
+    for _ in range(2):
+        game.apply_move(rng.choice(game.get_legal_moves()))
+    return tuple(game.get_player_location(p) for p in ("Player1", "Player2"))
+
+
+def schedule(num_cpu_agents, num_test_agents, num_matches, seed):
+    """Return the list of games of a tournament, grouped by cpu agent.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+    The openings and the seeds of the games only depend on `seed`, so a
+    tournament can be replayed.
     """
-    timeout_count = 0
-    forfeit_count = 0
-    for _ in range(num_matches):
+    games = []
+    for cpu in range(num_cpu_agents):
+        for match in range(num_matches):
+            rng = random.Random("{}:{}:{}".format(seed, cpu, match))
+            opening = choose_opening(rng)
+            for test in range(num_test_agents):
+                for test_first in (False, True):
+                    games.append(Game(cpu, test, test_first, opening, rng.getrandbits(32)))
+    return games
+
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
+# the agents of a tournament, set in every worker process by _init_worker
+_agents = None
 
-        # initialize all games with a random move and response
-        for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
-                game.apply_move(move)
 
-        # play all games and tally the results
+def _init_worker(cpu_agents, test_agents):
+    global _agents
+    _agents = (cpu_agents, test_agents)
+
+
+def play_game(game, time_limit=TIME_LIMIT, agents=None):
+    """Play one game of a tournament with fresh copies of the two agents
+
+    Parameters
+    ----------
+    game : Game
+        The game to play
+
+    time_limit : int (optional)
+        The number of milliseconds allowed for each move
+
+    agents : (list, list) (optional)
+        The cpu agents and the test agents of the tournament (by default,
+        those the worker process was initialized with)
+
+    Returns
+    -------
+    GameResult
+    """
+    cpu_agents, test_agents = agents or _agents
+    random.seed(game.seed)
+    cpu_player = copy.deepcopy(cpu_agents[game.cpu].player)
+    test_player = copy.deepcopy(test_agents[game.test].player)
+    if game.test_first:
+        board = Board(test_player, cpu_player)
+    else:
+        board = Board(cpu_player, test_player)
+    for move in game.opening:
+        board.apply_move(move)
+
+    start = timeit.default_timer()
+    winner, move_history, termination = board.play(time_limit=time_limit)
+    return GameResult(game, winner is test_player, termination, len(move_history),
+                      timeit.default_timer() - start, getattr(cpu_player, "stats", None),
+                      getattr(test_player, "stats", None))
+
+
+def play_games(games, cpu_agents, test_agents, workers=1, time_limit=TIME_LIMIT):
+    """Yield the results of a list of games, in order, playing them in
+    `workers` processes.
+    """
+    if workers <= 1:
         for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
-            win_counts[winner] += 1
+            yield play_game(game, time_limit, (cpu_agents, test_agents))
+        return
+    pool = Pool(workers, initializer=_init_worker, initargs=(cpu_agents, test_agents))
+    try:
+        for result in pool.imap(_play_game, [(game, time_limit) for game in games]):
+            yield result
+    finally:
+        pool.terminate()
 
-            if termination == "timeout":
-                timeout_count += 1
-            elif termination == "forfeit":
-                forfeit_count += 1
 
-    return timeout_count, forfeit_count
+def _play_game(args):
+    return play_game(*args)
+
+
+def elo(score):
+    """Return the Elo rating difference implied by an expected score """
+    if score <= 0:
+        return float("-inf")
+    if score >= 1:
+        return float("inf")
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_interval(wins, games, z=1.96):
+    """Return the Elo rating difference implied by `wins` out of `games`
+    together with the bounds of its (95% by default) Wilson score interval.
+
+    A win rate of 0 or 1 implies an infinite rating difference, so a sweep
+    is scored half a game short of it: the rating of 0/N or N/N and the
+    bounds of its interval stay finite.
+    """
+    score = min(max(wins, 0.5), games - 0.5) / games
+    spread = z * z / games
+    center = (score + spread / 2) / (1 + spread)
+    margin = z * math.sqrt(score * (1 - score) / games + spread / (4 * games)) / (1 + spread)
+    return elo(score), elo(center - margin), elo(center + margin)
+
+
+def format_elo(rating):
+    """Format a rating difference with its sign, printing 0 rather than -0 """
+    return "{:+.0f}".format(round(rating) + 0.)
+
+
+def print_stats(names, stats):
+    """Print a table of the search statistics of a list of agents """
+    print("\n{:^13}{:^8}{:^11}{:^10}{:^10}{:^9}{:^10}{:^10}".format(
+        "Agent", "Moves", "Depth", "Nodes/mv", "kNodes/s", "Cutoffs", "Timeouts", "Min left"))
+    for name, agent_stats in zip(names, stats):
+        s = agent_stats.summary()
+        print("{:^13}{:^8}{:^11}{:^10.0f}{:^10.1f}{:^9}{:^10}{:^10}".format(
+            name, s["moves"], "{} ({})".format(s["median_depth"], s["max_depth"]),
+            s["nodes_per_move"], s["nodes_per_sec"] / 1000,
+            "{:.0%}".format(s["cutoff_rate"]), "{:.0%}".format(s["timeout_rate"]),
+            "{:.1f}ms".format(s["min_margin"])))
 
 
 def update(total_wins, wins):
@@ -77,25 +207,53 @@ def update(total_wins, wins):
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
-    """Play matches between the test agent and each cpu_agent individually. """
+def play_matches(cpu_agents, test_agents, num_matches, workers=1, seed=None,
+                 time_limit=TIME_LIMIT):
+    """Play matches between the test agent and each cpu_agent individually.
+
+    The games are played in `workers` processes; `seed` (random by default)
+    determines the openings and the random choices of the agents.
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
     total_wins = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
     total_forfeits = 0.
     total_matches = 2 * num_matches * len(cpu_agents)
+    total_moves = 0
 
+    print("Seed: {}, workers: {}".format(seed, workers))
     print("\n{:^9}{:^13}".format("Match #", "Opponent") + ''.join(['{:^13}'.format(x[1].name) for x in enumerate(test_agents)]))
     print("{:^9}{:^13} ".format("", "") +  ' '.join(['{:^5}| {:^5}'.format("Won", "Lost") for x in enumerate(test_agents)]))
 
+    games = schedule(len(cpu_agents), len(test_agents), num_matches, seed)
+    games_per_round = 2 * num_matches * len(test_agents)
+    cpu_stats = [SearchStats() for _ in cpu_agents]
+    test_stats = [SearchStats() for _ in test_agents]
+    results = play_games(games, cpu_agents, test_agents, workers, time_limit)
+    start = timeit.default_timer()
+
     for idx, agent in enumerate(cpu_agents):
         wins = {key: 0 for (key, value) in test_agents}
         wins[agent.player] = 0
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
-        total_timeouts += counts[0]
-        total_forfeits += counts[1]
+        for _ in range(games_per_round):
+            result = next(results)
+            test_player = test_agents[result.game.test].player
+            wins[test_player if result.test_won else agent.player] += 1
+            total_moves += result.moves
+            if result.cpu_stats is not None:
+                cpu_stats[idx].merge(result.cpu_stats)
+            if result.test_stats is not None:
+                test_stats[result.game.test].merge(result.test_stats)
+
+            if result.termination == "timeout":
+                total_timeouts += 1
+            elif result.termination == "forfeit":
+                total_forfeits += 1
+
         total_wins = update(total_wins, wins)
         _total = 2 * num_matches
         round_totals = sum([[wins[agent.player], _total - wins[agent.player]]
@@ -105,6 +263,7 @@ def play_matches(cpu_agents, test_agents, num_matches):
                 round_totals[i],round_totals[i+1]
             ) for i in range(0, len(round_totals), 2)
         ]))
+    elapsed = timeit.default_timer() - start
 
     print("-" * 74)
     print('{:^9}{:^13}'.format("", "Win Rate:") +
@@ -114,6 +273,25 @@ def play_matches(cpu_agents, test_agents, num_matches):
             ) for x in enumerate(test_agents)
     ]))
 
+    # Elo rating of each test agent relative to the pool of cpu agents
+    ratings = [elo_interval(total_wins[agent.player], total_matches) for agent in test_agents]
+    print('{:^9}{:^13}'.format("", "Elo:") +
+          ''.join(['{:^13}'.format(format_elo(r[0])) for r in ratings]))
+    print('{:^9}{:^13}'.format("", "95% CI:") +
+          ''.join(['{:^13}'.format("[{},{}]".format(format_elo(r[1]), format_elo(r[2])))
+                   for r in ratings]))
+
+    num_games = len(games)
+    print(("\nPlayed {} games ({} moves) in {:.1f}s: {:.2f} games/sec, " +
+           "{:.1f} moves/sec").format(num_games, total_moves, elapsed,
+                                      num_games / elapsed, total_moves / elapsed))
+
+    # search statistics of the agents that recorded some
+    recorded = [(agent.name, s) for agent, s in zip(test_agents + cpu_agents,
+                                                    test_stats + cpu_stats) if s.moves]
+    if recorded:
+        print_stats(*zip(*recorded))
+
     if total_timeouts:
         print(("\nThere were {} timeouts during the tournament -- make sure " +
                "your agent handles search timeout correctly, and consider " +
@@ -124,33 +302,49 @@ def play_matches(cpu_agents, test_agents, num_matches):
                "legal moves available to play.\n").format(total_forfeits))
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument('-w', '--workers', type=int, default=cpu_count(),
+                        help="number of worker processes playing games (default: all CPUs)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed of the openings and of the agents' random choices")
+    parser.add_argument('--matches', type=int, default=NUM_MATCHES,
+                        help="number of matches against each opponent")
+    parser.add_argument('--time-limit', type=int, default=TIME_LIMIT,
+                        help="number of milliseconds allowed for each move")
+    parser.add_argument('--stats', action='store_true',
+                        help="record and report the search statistics of the agents")
+    args = parser.parse_args(argv)
+
+    def stats():
+        return SearchStats() if args.stats else None
 
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
     test_agents = [
-        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3")
+        Agent(AlphaBetaPlayer(score_fn=improved_score, stats=stats()), "AB_Improved"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score, stats=stats()), "AB_Custom"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score_2, stats=stats()), "AB_Custom_2"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score_3, stats=stats()), "AB_Custom_3")
     ]
 
     # Define a collection of agents to compete against the test agents
     cpu_agents = [
         Agent(RandomPlayer(), "Random"),
-        Agent(MinimaxPlayer(score_fn=open_move_score), "MM_Open"),
-        Agent(MinimaxPlayer(score_fn=center_score), "MM_Center"),
-        Agent(MinimaxPlayer(score_fn=improved_score), "MM_Improved"),
-        Agent(AlphaBetaPlayer(score_fn=open_move_score), "AB_Open"),
-        Agent(AlphaBetaPlayer(score_fn=center_score), "AB_Center"),
-        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
+        Agent(MinimaxPlayer(score_fn=open_move_score, stats=stats()), "MM_Open"),
+        Agent(MinimaxPlayer(score_fn=center_score, stats=stats()), "MM_Center"),
+        Agent(MinimaxPlayer(score_fn=improved_score, stats=stats()), "MM_Improved"),
+        Agent(AlphaBetaPlayer(score_fn=open_move_score, stats=stats()), "AB_Open"),
+        Agent(AlphaBetaPlayer(score_fn=center_score, stats=stats()), "AB_Center"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score, stats=stats()), "AB_Improved")
     ]
 
     print(DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    play_matches(cpu_agents, test_agents, args.matches, workers=args.workers,
+                 seed=args.seed, time_limit=args.time_limit)
 
 
 if __name__ == "__main__":
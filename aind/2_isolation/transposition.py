@@ -0,0 +1,93 @@
+"""A bounded transposition table for the alpha-beta search in game_agent.py.
+
+The table caches the result of searching a position (keyed by the Zobrist
+hash from `Board.hash()`) so that positions reached through different move
+orders, in later iterations of iterative deepening or on later turns, are
+not searched again.  Alpha-beta values are often only bounds on the true
+value, so each entry records whether its value is exact, a lower bound (the
+search failed high) or an upper bound (the search failed low), together with
+the depth searched and the best move found.
+
+The table has a fixed number of slots; a position maps to the slot given by
+its key modulo the size.  When two positions compete for a slot, the new
+entry replaces the old one if the old one was stored during an earlier
+search or was searched to a depth no greater than the new one.
+"""
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable(object):
+    """Fixed-size hash table of search results.
+
+    Parameters
+    ----------
+    size : int (optional)
+        The number of slots in the table.
+
+    Attributes
+    ----------
+    probes, hits, stores, replacements : int
+        The number of lookups, the lookups that found their position, the
+        entries written and the entries that overwrote a different position.
+    """
+    def __init__(self, size=2**16):
+        self.size = size
+        self.slots = [None] * size
+        self.age = 0
+        self.probes = self.hits = self.stores = self.replacements = 0
+
+    def new_search(self):
+        """Start a new search, so entries from the previous ones are replaced
+        first.
+        """
+        self.age += 1
+
+    def clear(self):
+        self.slots = [None] * self.size
+
+    def lookup(self, key):
+        """Return the entry of a position as a tuple (key, depth, flag, value,
+        move, age), or None if the position is not in the table.
+        """
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, flag, value, move):
+        """Record the result of searching a position to `depth` plies.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the position
+
+        depth : int
+            The number of plies searched below the position
+
+        flag : int
+            EXACT, LOWER (value is a lower bound) or UPPER (value is an upper
+            bound)
+
+        value : float
+            The value found by the search
+
+        move : (int, int)
+            The best move found, or None
+        """
+        slot = key % self.size
+        old = self.slots[slot]
+        if old is not None and old[0] != key:
+            if old[5] == self.age and old[1] > depth:
+                return
+            self.replacements += 1
+        self.slots[slot] = (key, depth, flag, value, move, self.age)
+        self.stores += 1
+
+    def __len__(self):
+        return sum(1 for entry in self.slots if entry is not None)
@@ -0,0 +1,203 @@
+"""
+Micro-benchmarks of the data structures of util.py.
+
+    $ python benchmark.py
+    $ python benchmark.py --layouts bigMaze,openMaze --size 60 --repeat 5
+
+`queue` compares util.PriorityQueue, whose update is an O(log n)
+decrease-key, with the previous implementation (LinearPriorityQueue below),
+whose update scans the whole heap and heapifies it again:
+
+  relax     Dijkstra's algorithm with update on every successor, on the
+            layouts and on an open grid of --size x --size cells, with random
+            costs of 1 to 9 for entering every cell (so priorities decrease
+            often).  Both queues must pop the cells in the same order.
+  pushpop   pushes and pops of random priorities only, the way
+            search.graphSearch uses its frontier.
+
+Before timing, compareQueues checks that both queues pop the same items in
+random sequences of push, update, pop and isEmpty, items pushed several
+times included.  The sequences never update an item with several entries
+in the queue: LinearPriorityQueue lowers whichever entry comes first in its
+heap list, util.PriorityQueue the entry with the lowest priority.
+"""
+
+import collections
+import heapq
+import random
+import timeit
+from optparse import OptionParser
+
+import layout
+import util
+
+
+class LinearPriorityQueue:
+    "util.PriorityQueue before its update became a decrease-key"
+    def  __init__(self):
+        self.heap = []
+        self.count = 0
+
+    def push(self, item, priority):
+        entry = (priority, self.count, item)
+        heapq.heappush(self.heap, entry)
+        self.count += 1
+
+    def pop(self):
+        (_, _, item) = heapq.heappop(self.heap)
+        return item
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def update(self, item, priority):
+        for index, (p, c, i) in enumerate(self.heap):
+            if i == item:
+                if p <= priority:
+                    break
+                del self.heap[index]
+                self.heap.append((priority, c, item))
+                heapq.heapify(self.heap)
+                break
+        else:
+            self.push(item, priority)
+
+QUEUES = [('linear', LinearPriorityQueue), ('indexed', util.PriorityQueue)]
+
+def compareQueues(trials, seed=0):
+    "Raises AssertionError unless both queues agree on random sequences of operations"
+    rng = random.Random(seed)
+    for trial in range(trials):
+        queues = [queueClass() for _, queueClass in QUEUES]
+        entries = collections.Counter()     # entries of every item in the queues
+        for _ in range(rng.randint(1, 60)):
+            op, item, priority = rng.random(), rng.randint(0, 8), rng.randint(0, 20)
+            if op < 0.3:
+                for queue in queues:
+                    queue.push(item, priority)
+                entries[item] += 1
+            elif op < 0.7 and entries[item] <= 1:
+                for queue in queues:
+                    queue.update(item, priority)
+                entries[item] = 1
+            elif op >= 0.7:
+                empty = [queue.isEmpty() for queue in queues]
+                if len(set(empty)) > 1:
+                    raise AssertionError('isEmpty differs in trial %d' % trial)
+                if not empty[0]:
+                    popped = [queue.pop() for queue in queues]
+                    if len(set(popped)) > 1:
+                        raise AssertionError('pop differs in trial %d: %s' % (trial, popped))
+                    entries[popped[0]] -= 1
+        drained = []
+        for queue in queues:
+            items = []
+            while not queue.isEmpty():
+                items.append(queue.pop())
+            drained.append(items)
+        if drained[0] != drained[1]:
+            raise AssertionError('the queues drain differently in trial %d' % trial)
+
+def openGrid(size):
+    "Returns a layout of size x size open cells surrounded by walls"
+    wall = '%' * (size + 2)
+    return layout.Layout([wall] + ['%' + 'P' + ' ' * (size - 1) + '%'] +
+                         ['%' + ' ' * size + '%'] * (size - 1) + [wall])
+
+def cellCosts(walls, seed=0):
+    "Returns a random cost of 1 to 9 for entering every open cell"
+    rng = random.Random(seed)
+    return dict(((x, y), rng.randint(1, 9))
+                for x in range(walls.width) for y in range(walls.height) if not walls[x][y])
+
+def dijkstra(walls, start, costs, queueClass):
+    """
+    Returns the cells in the order they are expanded and the number of
+    calls of update, with every successor relaxed by queue.update.
+    """
+    queue = queueClass()
+    queue.push(start, 0)
+    distances = {start: 0}
+    closed = set()
+    order = []
+    updates = 0
+    while not queue.isEmpty():
+        cell = queue.pop()
+        closed.add(cell)
+        order.append(cell)
+        x, y = cell
+        for successor in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+            if walls[successor[0]][successor[1]] or successor in closed:
+                continue
+            distance = distances[cell] + costs[successor]
+            if distance < distances.get(successor, float('inf')):
+                distances[successor] = distance
+            queue.update(successor, distance)
+            updates += 1
+    return order, updates
+
+def bestTime(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+def benchmarkRelax(layouts, repeat):
+    "Returns the results of the relax benchmark for every (name, layout)"
+    results = []
+    for name, lay in layouts:
+        walls = lay.walls
+        start = lay.agentPositions[0][1]
+        costs = cellCosts(walls)
+        orders = {}
+        times = {}
+        for queueName, queueClass in QUEUES:
+            orders[queueName], updates = dijkstra(walls, start, costs, queueClass)
+            times[queueName] = bestTime(lambda: dijkstra(walls, start, costs, queueClass), repeat)
+        if orders['linear'] != orders['indexed']:
+            raise AssertionError('the queues expanded %s in different orders' % name)
+        results.append((name, len(costs), updates, times))
+    return results
+
+def benchmarkPushPop(n, repeat):
+    "Returns the time of n pushes and n pops of random priorities with every queue"
+    rng = random.Random(0)
+    priorities = [rng.random() for _ in range(n)]
+
+    def pushPop(queueClass):
+        queue = queueClass()
+        for i, priority in enumerate(priorities):
+            queue.push(i, priority)
+        while not queue.isEmpty():
+            queue.pop()
+
+    return dict((queueName, bestTime(lambda: pushPop(queueClass), repeat))
+                for queueName, queueClass in QUEUES)
+
+def printTimes(label, times):
+    print('%-28s%12.2f%12.2f%10.1fx' % (label, 1000 * times['linear'], 1000 * times['indexed'],
+                                        times['linear'] / times['indexed']))
+
+if __name__ == '__main__':
+    parser = OptionParser(usage=__doc__.strip().split('\n\n')[1])
+    parser.add_option('--layouts', default='mediumMaze,bigMaze,openMaze',
+                      help='comma separated layouts of the relax benchmark [Default: %default]')
+    parser.add_option('--size', type='int', default=40,
+                      help='side of the open grid of the relax benchmark (0 for none) [Default: %default]')
+    parser.add_option('--pushes', type='int', default=100000,
+                      help='number of pushes of the pushpop benchmark [Default: %default]')
+    parser.add_option('--trials', type='int', default=2000,
+                      help='random sequences compared before timing [Default: %default]')
+    parser.add_option('--repeat', type='int', default=3,
+                      help='runs of every benchmark, the best is reported [Default: %default]')
+    options, _ = parser.parse_args()
+
+    compareQueues(options.trials)
+    print('%d random sequences: the queues agree' % options.trials)
+
+    layouts = [(name, layout.getLayout(name)) for name in options.layouts.split(',') if name]
+    if options.size:
+        layouts.append(('open %dx%d' % (options.size, options.size), openGrid(options.size)))
+
+    print('%-28s%12s%12s%11s' % ('milliseconds', 'linear', 'indexed', 'speedup'))
+    for name, cells, updates, times in benchmarkRelax(layouts, options.repeat):
+        printTimes('relax %s' % name, times)
+        print('  %d cells, %d updates' % (cells, updates))
+    printTimes('pushpop %d' % options.pushes, benchmarkPushPop(options.pushes, options.repeat))
@@ -0,0 +1,165 @@
+"""
+MazeDistances answers the maze distance between any two open cells of a
+layout in O(1): it runs a breadth first search from every open cell once and
+keeps the distances in a flat array('H') of n * n entries for the n open
+cells (about 0.8 MB for bigMaze), cell pairs with no path holding
+UNREACHABLE.
+
+The distances only depend on the walls, so the MazeDistances of the last
+MAX_SHARED walls used are shared by the problems of a process (see
+getMazeDistances), and the distances are cached on disk in CACHE_DIR, a
+directory of the user's cache, in a file named after a hash of the layout
+text of the walls.  The file starts with a SHA-1 checksum of the key and
+the distances, and is recomputed if it does not match.  Nothing is computed
+or read before the first query, so problems whose heuristic never asks for
+a distance pay nothing.
+
+FoodSearchProblem stores the MazeDistances of its walls in
+problem.heuristicInfo['mazeDistances'] for the heuristics:
+
+    distances = problem.heuristicInfo['mazeDistances']
+    distances.getDistance(position, food)
+"""
+
+from array import array
+import collections
+import hashlib
+import os
+import sys
+
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or
+                         os.path.join(os.path.expanduser('~'), '.cache'), 'pacmanMazeDistances')
+UNREACHABLE = 0xFFFF
+MAX_SHARED = 4
+
+_mazeDistances = collections.OrderedDict() # key of the walls -> MazeDistances, oldest use first
+_lastWalls = None   # (the last Grid of walls given to getMazeDistances, its MazeDistances)
+
+def wallsText(walls):
+    "Returns the layout text of a Grid of walls: '%' for walls, ' ' for open cells"
+    return '\n'.join(''.join(walls[x][y] and '%' or ' ' for x in range(walls.width))
+                     for y in range(walls.height - 1, -1, -1))
+
+def getMazeDistances(walls, cacheDir=CACHE_DIR):
+    """
+    Returns the MazeDistances of a Grid of walls, shared by the problems of a
+    process.  The walls must not change afterwards: the Grid of the last call
+    is recognized by identity, so the calls for the walls of a game do not
+    hash their layout text again.
+    """
+    global _lastWalls
+    if _lastWalls is not None and _lastWalls[0] is walls:
+        return _lastWalls[1]
+    distances = MazeDistances(walls, cacheDir)
+    distances = _mazeDistances.pop(distances.key, distances)
+    _mazeDistances[distances.key] = distances
+    while len(_mazeDistances) > MAX_SHARED:
+        _mazeDistances.popitem(last=False)
+    _lastWalls = (walls, distances)
+    return distances
+
+class MazeDistances:
+    """
+    The maze distances between all the open cells of a Grid of walls.
+
+    cacheDir is the directory of the disk cache, or None for no disk cache.
+    """
+    def __init__(self, walls, cacheDir=CACHE_DIR):
+        self.cacheDir = cacheDir
+        text = wallsText(walls)
+        self.key = hashlib.sha1(text.encode()).hexdigest()
+        # open cells in column order, and their indices in the array
+        self.cells = [(x, y) for x in range(walls.width) for y in range(walls.height)
+                      if not walls[x][y]]
+        self.index = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.distances = None
+
+    def getDistance(self, pos1, pos2):
+        """
+        Returns the maze distance between two open cells, or None if no path
+        joins them.  Positions may be floats (agents between two cells).
+        """
+        if self.distances is None:
+            self.load()
+        n = len(self.cells)
+        index = self.index
+        try:
+            i, j = index[pos1], index[pos2]
+        except KeyError:
+            i = index[int(pos1[0]), int(pos1[1])]
+            j = index[int(pos2[0]), int(pos2[1])]
+        distance = self.distances[i * n + j]
+        if distance == UNREACHABLE:
+            return None
+        return distance
+
+    def load(self):
+        "Reads the distances from the disk cache, or computes and caches them"
+        n = len(self.cells)
+        path = self.cachePath()
+        if path is not None and os.path.exists(path) and os.path.getsize(path) == 20 + 2 * n * n:
+            distances = array('H')
+            with open(path, 'rb') as f:
+                digest = f.read(20)
+                distances.fromfile(f, n * n)
+            if digest == self.checksum(distances):
+                self.distances = distances
+                return
+        self.distances = self.compute()
+        if path is not None:
+            self.save(path)
+
+    def compute(self):
+        "Returns the distances of all the pairs of cells, one breadth first search per cell"
+        cells, index = self.cells, self.index
+        n = len(cells)
+        if n >= UNREACHABLE:
+            raise Exception('MazeDistances supports up to %d open cells' % (UNREACHABLE - 1))
+        neighbors = []
+        for x, y in cells:
+            neighbors.append([index[cell] for cell in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y))
+                              if cell in index])
+        distances = array('H')
+        for source in range(n):
+            row = [UNREACHABLE] * n
+            row[source] = 0
+            queue = collections.deque([source])
+            while queue:
+                i = queue.popleft()
+                distance = row[i] + 1
+                for j in neighbors[i]:
+                    if row[j] == UNREACHABLE:
+                        row[j] = distance
+                        queue.append(j)
+            distances.extend(row)
+        return distances
+
+    def checksum(self, distances):
+        "Returns the SHA-1 digest of the key and the distances, which starts the cache file"
+        digest = hashlib.sha1(self.key.encode())
+        digest.update(distances)
+        return digest.digest()
+
+    def cachePath(self):
+        "Returns the path of the cache file of the distances, or None without a disk cache"
+        if self.cacheDir is None:
+            return None
+        return os.path.join(self.cacheDir, '%s-%s.bin' % (self.key, sys.byteorder))
+
+    def save(self, path):
+        "Writes the distances to the disk cache, if it is writable"
+        try:
+            if not os.path.isdir(self.cacheDir):
+                os.makedirs(self.cacheDir, 0o700)
+            partial = '%s.%d' % (path, os.getpid())
+            with open(partial, 'wb') as f:
+                f.write(self.checksum(self.distances))
+                self.distances.tofile(f)
+            try:
+                os.rename(partial, path)
+            except OSError:
+                # Windows does not rename over an existing file: another
+                # process has cached the same distances meanwhile
+                os.remove(partial)
+        except (IOError, OSError):
+            pass
@@ -72,6 +72,83 @@ def tinyMazeSearch(problem):
     w = Directions.WEST
     return  [s, s, w, s, w, w, s, w]
 
+def _actions(node):
+    """
+    Returns the actions leading to a search node, found by following the
+    parent pointers of the nodes back to the start state.
+    """
+    actions = []
+    while node[2] is not None:
+        actions.append(node[1])
+        node = node[2]
+    actions.reverse()
+    return actions
+
+def graphSearch(problem, frontier, expandOnce=True):
+    """
+    Search the nodes of the problem in the order given by the frontier, a
+    util.Stack, util.Queue or util.PriorityQueueWithFunction, and return the
+    actions reaching the first goal state popped from it (False if there is
+    none).
+
+    A search node is a tuple (state, action, parent node, path cost), so a
+    node only stores the action reaching it and the actions of a path are
+    rebuilt from the parent pointers once a goal is found.  The closed list
+    is a set of states: a successor is not pushed if its state was already
+    expanded.  When expandOnce is True, a node popped after its state was
+    expanded is skipped; when False, it is expanded again, as the original
+    depthFirstSearch did (and its expansions are counted again by the
+    problem's _expanded).
+    """
+    closed = set()
+    frontier.push((problem.getStartState(), None, None, 0))
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        state = node[0]
+        if problem.isGoalState(state):
+            return _actions(node)
+        if state in closed:
+            if expandOnce:
+                continue
+        else:
+            closed.add(state)
+        for child, action, stepCost in problem.getSuccessors(state):
+            if child not in closed:
+                frontier.push((child, action, node, node[3] + stepCost))
+    return False
+
+def bestFirstSearch(problem, priority):
+    """
+    Search the node of lowest priority(node) first, for a priority that
+    never decreases along a path (the path cost, or the path cost plus a
+    consistent heuristic), and return the actions reaching the first goal
+    state popped (False if there is none).
+
+    Unlike graphSearch, the frontier holds every state once: it is a
+    util.PriorityQueue of states, and when a cheaper path to a state in the
+    frontier is found, the node of the state is replaced and its priority
+    lowered with update (a decrease-key) instead of pushing a duplicate.
+    """
+    start = problem.getStartState()
+    nodes = {start: (start, None, None, 0)}     # best node found for every state
+    frontier = util.PriorityQueue()
+    frontier.push(start, priority(nodes[start]))
+    closed = set()
+    while not frontier.isEmpty():
+        state = frontier.pop()
+        node = nodes[state]
+        if problem.isGoalState(state):
+            return _actions(node)
+        closed.add(state)
+        for child, action, stepCost in problem.getSuccessors(state):
+            if child in closed:
+                continue
+            cost = node[3] + stepCost
+            if child not in nodes or cost < nodes[child][3]:
+                nodes[child] = (child, action, node, cost)
+                frontier.update(child, priority(nodes[child]))
+    return False
+
 def depthFirstSearch(problem):
     """
     Search the deepest nodes in the search tree first.
@@ -87,34 +164,19 @@ def depthFirstSearch(problem):
     print "Start's successors:", problem.getSuccessors(problem.getStartState())
     """
     "*** YOUR CODE HERE ***"
-    node = problem.getStartState()
-
-    if problem.isGoalState(node):
+    if problem.isGoalState(problem.getStartState()):
         return []
-
-    frontier = util.Stack()
-    frontier.push((node, []))
-    explored = util.Queue()
-
-    while not frontier.isEmpty(): 
-        (node, actions) = frontier.pop()
-        if problem.isGoalState(node):
-            return actions
-        explored.push(node)
-        for child, action, _ in problem.getSuccessors(node):
-            if child not in explored.list:# or child not in frontier.list:
-                frontier.push((child, actions + [action]))
-    return False
+    return graphSearch(problem, util.Stack(), expandOnce=False)
 
 def breadthFirstSearch(problem):
     """Search the shallowest nodes in the search tree first."""
     "*** YOUR CODE HERE ***"
-    util.raiseNotDefined()
+    return graphSearch(problem, util.Queue())
 
 def uniformCostSearch(problem):
     """Search the node of least total cost first."""
     "*** YOUR CODE HERE ***"
-    util.raiseNotDefined()
+    return bestFirstSearch(problem, lambda node: node[3])
 
 def nullHeuristic(state, problem=None):
     """
@@ -126,7 +188,8 @@ def nullHeuristic(state, problem=None):
 def aStarSearch(problem, heuristic=nullHeuristic):
     """Search the node that has the lowest combined cost and heuristic first."""
     "*** YOUR CODE HERE ***"
-    util.raiseNotDefined()
+    priority = lambda node: node[3] + heuristic(node[0], problem)
+    return bestFirstSearch(problem, priority)
 
 
 # Abbreviations
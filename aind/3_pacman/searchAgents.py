@@ -40,6 +40,7 @@ from game import Actions
 import util
 import time
 import search
+import mazeDistances
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -383,6 +384,8 @@ class FoodSearchProblem:
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
+        # maze distances between any two cells (see mazeDistances.py), computed on first use
+        self.heuristicInfo['mazeDistances'] = mazeDistances.getMazeDistances(self.walls)
 
     def getStartState(self):
         return self.start
@@ -451,6 +454,11 @@ def foodHeuristic(state, problem):
     value, try: problem.heuristicInfo['wallCount'] = problem.walls.count()
     Subsequent calls to this heuristic can access
     problem.heuristicInfo['wallCount']
+
+    problem.heuristicInfo['mazeDistances'] already holds the maze distances
+    between all the cells of the layout:
+    problem.heuristicInfo['mazeDistances'].getDistance(position, (x, y))
+    looks one up in O(1) (they are computed once per layout, on first use).
     """
     position, foodGrid = state
     "*** YOUR CODE HERE ***"
@@ -525,9 +533,10 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
 def mazeDistance(point1, point2, gameState):
     """
-    Returns the maze distance between any two points, using the search functions
-    you have already built. The gameState can be any game state -- Pacman's
-    position in that state is ignored.
+    Returns the maze distance between any two points, looked up in the maze
+    distances of the layout (see mazeDistances.py), which are computed once
+    per layout. The gameState can be any game state -- Pacman's position in
+    that state is ignored.
 
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
@@ -538,5 +547,6 @@ def mazeDistance(point1, point2, gameState):
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    distance = mazeDistances.getMazeDistances(walls).getDistance(point1, point2)
+    assert distance is not None, 'no path from %s to %s' % (point1, point2)
+    return distance
@@ -29,6 +29,7 @@
 import sys
 import inspect
 import heapq, random
+import collections
 import io
 
 
@@ -151,11 +152,12 @@ class Stack:
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        # newest item first, like a list with inserts at 0 but O(1)
+        self.list = collections.deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.list.appendleft(item)
 
     def pop(self):
         """
@@ -174,37 +176,69 @@ class PriorityQueue:
       has a priority associated with it and the client is usually interested
       in quick retrieval of the lowest-priority item in the queue. This
       data structure allows O(1) access to the lowest-priority item.
+
+      update is a decrease-key in O(log n): the queue keeps an index from
+      every item to the (priority, count) keys of its entries in the heap, and
+      instead of being moved, the entry of an item whose priority decreases
+      is marked removed and skipped when it reaches the top (lazy deletion).
+      An item pushed several times has several live entries; update lowers
+      the one with the lowest priority, and the others stay indexed after it
+      is popped.  The index is only built on the first call of update, so
+      queues only used with push and pop do not hash their items; items
+      given to update must be hashable.
     """
     def  __init__(self):
         self.heap = []
         self.count = 0
+        self.index = None       # item -> keys of its live entries
+        self.removed = set()    # keys of the entries replaced by update
 
     def push(self, item, priority):
         entry = (priority, self.count, item)
         heapq.heappush(self.heap, entry)
         self.count += 1
+        if self.index is not None:
+            self.index.setdefault(item, []).append((priority, entry[1]))
 
     def pop(self):
-        (_, _, item) = heapq.heappop(self.heap)
+        (priority, count, item) = heapq.heappop(self.heap)
+        if self.removed:
+            while (priority, count) in self.removed:
+                self.removed.remove((priority, count))
+                (priority, count, item) = heapq.heappop(self.heap)
+        if self.index is not None:
+            keys = self.index[item]
+            if len(keys) == 1:
+                del self.index[item]
+            else:
+                keys.remove((priority, count))
         return item
 
     def isEmpty(self):
+        while self.removed and self.heap[0][:2] in self.removed:
+            self.removed.remove(heapq.heappop(self.heap)[:2])
         return len(self.heap) == 0
 
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
         # If item not in priority queue, do the same thing as self.push.
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        if self.index is None:
+            self.index = {}
+            for (p, c, i) in self.heap:
+                if (p, c) not in self.removed:
+                    self.index.setdefault(i, []).append((p, c))
+        keys = self.index.get(item)
+        if keys is None:
             self.push(item, priority)
+            return
+        key = min(keys)
+        if priority < key[0]:
+            # the new entry keeps the count of the old one, so ties are
+            # still broken in the order the items were first pushed
+            self.removed.add(key)
+            heapq.heappush(self.heap, (priority, key[1], item))
+            keys[keys.index(key)] = (priority, key[1])
 
 class PriorityQueueWithFunction(PriorityQueue):
     """